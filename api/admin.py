@@ -6,6 +6,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from .models import (
     User,
+    IdSequence,
     ServiceDefinition,
     AgencySettings,
     AgencySettingsService,
@@ -13,12 +14,16 @@ from .models import (
     Quotation,
     QuotationItem,
     Voucher,
+    DailyLedger,
     Contract,
     ContractClause,
     ContractClauseLink,
     Freelancer,
     FreelanceWork,
     SMSLog,
+    SMSOutbox,
+    SearchDocument,
+    Tombstone,
 )
 
 
@@ -32,6 +37,11 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+@admin.register(IdSequence)
+class IdSequenceAdmin(admin.ModelAdmin):
+    list_display = ("prefix", "last_value")
+
+
 @admin.register(ServiceDefinition)
 class ServiceDefinitionAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "description")
@@ -92,6 +102,13 @@ class VoucherAdmin(admin.ModelAdmin):
     search_fields = ("party_name", "description")
 
 
+@admin.register(DailyLedger)
+class DailyLedgerAdmin(admin.ModelAdmin):
+    list_display = ("day", "currency", "type", "category", "total", "count")
+    list_filter = ("currency", "type", "category")
+    date_hierarchy = "day"
+
+
 class ContractClauseLinkInline(admin.TabularInline):
     model = ContractClauseLink
     extra = 0
@@ -141,3 +158,25 @@ class SMSLogAdmin(admin.ModelAdmin):
     list_filter = ("status",)
     search_fields = ("to", "body")
     readonly_fields = ("timestamp",)
+
+
+@admin.register(SMSOutbox)
+class SMSOutboxAdmin(admin.ModelAdmin):
+    list_display = ("id", "to", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("to", "body", "sid")
+    readonly_fields = ("created_at", "sent_at", "claim_token", "sid")
+
+
+@admin.register(SearchDocument)
+class SearchDocumentAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "object_id", "title", "category")
+    list_filter = ("kind",)
+    search_fields = ("object_id",)
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "object_id", "deleted_at")
+    list_filter = ("kind",)
+    search_fields = ("object_id",)
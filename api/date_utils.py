@@ -0,0 +1,33 @@
+"""
+Parse the frontend's display date strings (locale formatted) into real dates.
+The string stays the source of truth for display; the parsed date backs indexes,
+range filters and ordering.
+"""
+import re
+
+from dateutil import parser
+
+# Arabic-Indic and Extended Arabic-Indic digits -> ASCII
+_DIGITS = {ord(c): str(i) for i, c in enumerate("٠١٢٣٤٥٦٧٨٩")}
+_DIGITS.update({ord(c): str(i) for i, c in enumerate("۰۱۲۳۴۵۶۷۸۹")})
+# Bidi marks that toLocaleDateString("ar-...") inserts around separators
+_MARKS = re.compile("[\u200e\u200f\u061c\u202a-\u202e]")
+_YEAR_FIRST = re.compile(r"^\d{4}[-/.]")
+
+
+def parse_display_date(value):
+    """
+    Return a datetime.date for a frontend date string, or None if it cannot be parsed.
+    ISO-like strings (2024-03-12, 2024/3/12) are year-first; anything else is read
+    day-first, as the Arabic (ar-IQ) locale formats dates (12/3/2024).
+    """
+    if not value:
+        return None
+    text = _MARKS.sub("", str(value)).translate(_DIGITS).replace("\u060c", ",").strip()
+    if not text:
+        return None
+    year_first = bool(_YEAR_FIRST.match(text))
+    try:
+        return parser.parse(text, dayfirst=not year_first, yearfirst=year_first).date()
+    except (ValueError, OverflowError):
+        return None
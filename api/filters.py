@@ -0,0 +1,83 @@
+"""
+Query-parameter filtering for list endpoints (applied in the database, not the browser).
+"""
+from django.db.models import Q
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+class QueryParamFilterBackend(BaseFilterBackend):
+    """
+    Filter a viewset's queryset from query parameters declared on the view:
+
+    - exact_filter_fields: {param: field}; ?status=PENDING or ?category=SALARY,DAILY
+    - date_filter_field: parsed date column for ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD (inclusive)
+    - text_filter_fields: {param: [fields]}; case-insensitive contains on any of the fields
+    """
+
+    date_from_param = "date_from"
+    date_to_param = "date_to"
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        for param, field in getattr(view, "exact_filter_fields", {}).items():
+            values = [v.strip() for v in params.get(param, "").split(",") if v.strip()]
+            if len(values) == 1:
+                queryset = queryset.filter(**{field: values[0]})
+            elif values:
+                queryset = queryset.filter(**{f"{field}__in": values})
+
+        date_field = getattr(view, "date_filter_field", None)
+        if date_field:
+            date_from = self._parse_date(params, self.date_from_param)
+            date_to = self._parse_date(params, self.date_to_param)
+            if date_from:
+                queryset = queryset.filter(**{f"{date_field}__gte": date_from})
+            if date_to:
+                queryset = queryset.filter(**{f"{date_field}__lte": date_to})
+
+        for param, fields in getattr(view, "text_filter_fields", {}).items():
+            text = params.get(param, "").strip()
+            if text:
+                condition = Q()
+                for field in fields:
+                    condition |= Q(**{f"{field}__icontains": text})
+                queryset = queryset.filter(condition)
+        return queryset
+
+    @staticmethod
+    def _parse_date(params, param):
+        raw = params.get(param, "").strip()
+        if not raw:
+            return None
+        try:
+            value = parse_date(raw)
+        except ValueError:
+            value = None
+        if value is None:
+            raise ValidationError({param: "Use YYYY-MM-DD."})
+        return value
+
+    def get_schema_operation_parameters(self, view):
+        def param(name, description):
+            return {
+                "name": name,
+                "required": False,
+                "in": "query",
+                "description": description,
+                "schema": {"type": "string"},
+            }
+
+        parameters = [
+            param(name, f"Exact {field}; comma-separate several values.")
+            for name, field in getattr(view, "exact_filter_fields", {}).items()
+        ]
+        if getattr(view, "date_filter_field", None):
+            parameters.append(param(self.date_from_param, "Earliest date (YYYY-MM-DD), inclusive."))
+            parameters.append(param(self.date_to_param, "Latest date (YYYY-MM-DD), inclusive."))
+        parameters += [
+            param(name, "Contains (case-insensitive) in " + ", ".join(fields) + ".")
+            for name, fields in getattr(view, "text_filter_fields", {}).items()
+        ]
+        return parameters
@@ -1,24 +1,69 @@
 """
 Generate human-readable IDs in format PREFIX-NNNN (e.g. QT-5000, VC-5000).
 Starts from 5000 per prefix; existing UUIDs in DB are ignored.
+Numbers come from a per-prefix counter row (IdSequence) incremented atomically,
+so allocation is O(1) and concurrent workers never receive the same ID.
 """
 import re
 
+from django.db import transaction
+from django.db.models import F
+
+from .models import IdSequence
+
 MIN_START_NUMBER = 5000
 
 
-def get_next_id(prefix: str, model_class) -> str:
+def _max_existing_number(prefix: str, model_class) -> int:
     """
-    Return next ID for the given model as PREFIX-NNNN (number >= 5000).
-    Queries existing PKs matching PREFIX-\\d+, finds max number, returns PREFIX-(max+1).
-    First ID is PREFIX-5000.
+    Highest NNNN among existing PKs matching PREFIX-\\d+ (or MIN_START_NUMBER - 1).
+    Only used once per prefix, to seed a counter row that does not exist yet.
     """
     pk_field = model_class._meta.pk.name
-    existing = model_class.objects.values_list(pk_field, flat=True)
+    existing = model_class.objects.filter(
+        **{f"{pk_field}__startswith": f"{prefix}-"}
+    ).values_list(pk_field, flat=True)
     pattern = re.compile(r"^%s-(\d+)$" % re.escape(prefix))
     numbers = []
     for pk in existing:
-        if isinstance(pk, str) and pattern.match(pk):
-            numbers.append(int(pattern.match(pk).group(1)))
-    next_num = max(numbers, default=MIN_START_NUMBER - 1) + 1
-    return f"{prefix}-{next_num}"
+        match = pattern.match(pk) if isinstance(pk, str) else None
+        if match:
+            numbers.append(int(match.group(1)))
+    return max(numbers, default=MIN_START_NUMBER - 1)
+
+
+def _allocate(prefix: str, model_class, count: int) -> range:
+    """
+    Atomically advance the counter for prefix by count and return the reserved numbers.
+    The UPDATE takes the row (SQLite: database) write lock first, so the value read
+    back inside the same transaction belongs to this caller only.
+    """
+    sequences = IdSequence.objects.filter(prefix=prefix)
+    with transaction.atomic():
+        if not sequences.update(last_value=F("last_value") + count):
+            IdSequence.objects.get_or_create(
+                prefix=prefix,
+                defaults={"last_value": _max_existing_number(prefix, model_class)},
+            )
+            sequences.update(last_value=F("last_value") + count)
+        last = sequences.values_list("last_value", flat=True).get()
+    return range(last - count + 1, last + 1)
+
+
+def get_next_id(prefix: str, model_class) -> str:
+    """
+    Return next ID for the given model as PREFIX-NNNN (number >= 5000).
+    First ID is PREFIX-5000; model_class is only scanned when the prefix has no counter yet.
+    """
+    (number,) = _allocate(prefix, model_class, 1)
+    return f"{prefix}-{number}"
+
+
+def reserve_ids(prefix: str, model_class, count: int) -> list:
+    """
+    Reserve count consecutive IDs for prefix in one counter update (for nested rows).
+    Returns [] without touching the DB when count is 0.
+    """
+    if count <= 0:
+        return []
+    return [f"{prefix}-{number}" for number in _allocate(prefix, model_class, count)]
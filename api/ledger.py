@@ -0,0 +1,74 @@
+"""
+Incremental maintenance of the DailyLedger voucher rollup.
+Every voucher contributes its amount and a count of 1 to the row for its
+(day, currency, type, category); saves and deletes apply the difference.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+from .models import DailyLedger, Voucher
+
+
+def ledger_key(voucher):
+    """The DailyLedger key a voucher is counted under."""
+    day = voucher.date_value
+    if day is None:
+        created_at = voucher.created_at
+        day = created_at.date() if created_at else None
+    return {
+        "day": day,
+        "currency": voucher.currency,
+        "type": voucher.type,
+        "category": voucher.category or "",
+    }
+
+
+def apply_delta(key, amount, count):
+    """Add amount/count to the rollup row for key, creating it on first use."""
+    if key["day"] is None or (not amount and not count):
+        return
+    rows = DailyLedger.objects.filter(**key)
+    if rows.update(total=F("total") + amount, count=F("count") + count):
+        return
+    try:
+        with transaction.atomic():
+            DailyLedger.objects.create(total=amount, count=count, **key)
+    except IntegrityError:
+        # Another writer created the row between our UPDATE and INSERT.
+        rows.update(total=F("total") + amount, count=F("count") + count)
+
+
+def record_change(old, new):
+    """
+    Apply a voucher change: old/new are (key, amount) before and after, or None
+    for a create (old) or a delete (new).
+    """
+    if old and new and old[0] == new[0]:
+        apply_delta(new[0], new[1] - old[1], 0)
+        return
+    if old:
+        apply_delta(old[0], -old[1], -1)
+    if new:
+        apply_delta(new[0], new[1], 1)
+
+
+def snapshot(voucher):
+    return ledger_key(voucher), Decimal(voucher.amount)
+
+
+@transaction.atomic
+def rebuild():
+    """Recompute the whole rollup from the voucher table; returns the number of rows."""
+    DailyLedger.objects.all().delete()
+    rows = (
+        Voucher.objects.annotate(day=Coalesce("date_value", TruncDate("created_at")))
+        .values("day", "currency", "type", "category")
+        .annotate(total=Sum("amount"), count=Count("pk"))
+        .order_by()
+    )
+    entries = [DailyLedger(**row) for row in rows]
+    DailyLedger.objects.bulk_create(entries, batch_size=500)
+    return len(entries)
@@ -0,0 +1,127 @@
+"""
+Fast rendering of flat list pages from QuerySet.values() rows.
+
+DRF serializes a list one field at a time per row: get_attribute through the source
+path, the None check and the field's to_representation (a DecimalField copies the
+decimal context and rebuilds the quantum for every value). Here each output field gets
+one mapper, compiled once per serializer class and field set: str for char fields, a
+dict lookup for choices, a prebuilt quantize for decimals, and the field's own
+to_representation for anything else. The output is the same as the serializer's.
+Serializers with fields read from related rows (quotation items, contract clauses)
+are not compiled and go through DRF.
+"""
+import decimal
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import fields as drf_fields
+from rest_framework.settings import api_settings
+
+
+class ValuesRenderer:
+    """Turns .values(*columns) rows into the serializer's output dicts."""
+
+    def __init__(self, columns, mappers):
+        self.columns = columns
+        # (output name, column, convert, convert None too)
+        self.mappers = mappers
+
+    def render(self, rows):
+        mappers = self.mappers
+        data = []
+        for row in rows:
+            rep = {}
+            for name, column, convert, with_none in mappers:
+                value = row[column]
+                rep[name] = convert(value) if with_none or value is not None else None
+            data.append(rep)
+        return data
+
+
+def _is(field, field_class):
+    return type(field).to_representation is field_class.to_representation
+
+
+def _decimal_mapper(field):
+    coerce_to_string = getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize or field.normalize_output or field.decimal_places is None:
+        return field.to_representation
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    quantum = decimal.Decimal(".1") ** field.decimal_places
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return f"{value.quantize(quantum, rounding=rounding, context=context):f}"
+
+    return convert
+
+
+def _choice_mapper(field):
+    choices = field.choice_strings_to_values
+
+    def convert(value):
+        if value == "":
+            return value
+        return choices.get(str(value), value)
+
+    return convert
+
+
+def _mapper(field):
+    if _is(field, drf_fields.CharField):
+        return str
+    if _is(field, drf_fields.ChoiceField):
+        return _choice_mapper(field)
+    if _is(field, drf_fields.DecimalField):
+        return _decimal_mapper(field)
+    if _is(field, drf_fields.IntegerField):
+        return int
+    return field.to_representation
+
+
+@lru_cache(maxsize=None)
+def compile_renderer(serializer_class, fields=None):
+    """
+    ValuesRenderer for serializer_class limited to `fields` (a tuple of output names,
+    None for all), or None when a readable field is not a plain column of the model.
+    serializer_class.value_overrides lists what its to_representation() replaces:
+    {output name: (model field, function)}, applied to None too; names that are not
+    readable fields are appended at the end, as to_representation() does.
+    """
+    context = {"fields": list(fields)} if fields is not None else {}
+    serializer = serializer_class(context=context)
+    opts = serializer_class.Meta.model._meta
+    overrides = getattr(serializer_class, "value_overrides", {})
+    columns = []
+    mappers = []
+
+    def column(name):
+        try:
+            model_field = opts.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete:
+            return None
+        if model_field.attname not in columns:
+            columns.append(model_field.attname)
+        return model_field.attname
+
+    for field in serializer._readable_fields:
+        name = field.field_name
+        if name in overrides:
+            source, convert = overrides[name]
+            mappers.append((name, column(source), convert, True))
+            continue
+        if len(field.source_attrs) != 1 or column(field.source) is None:
+            return None
+        mappers.append((name, column(field.source), _mapper(field), False))
+    for name, (source, convert) in overrides.items():
+        if name in serializer.fields and not any(m[0] == name for m in mappers):
+            mappers.append((name, column(source), convert, True))
+    if any(m[1] is None for m in mappers):
+        return None
+    return ValuesRenderer(columns, mappers)
@@ -0,0 +1,140 @@
+"""
+Agency logo storage. Uploaded images (base64 data URLs from the frontend) are decoded
+and written to MEDIA_ROOT/logos/ under a content-hash name, together with resized
+WebP/PNG variants made with Pillow. The settings row only keeps the stored name, and
+because a new image gets a new name, the files can be cached forever by browsers.
+"""
+import base64
+import binascii
+import hashlib
+import io
+import re
+from urllib.parse import urlparse
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, UnidentifiedImageError
+
+LOGO_DIR = "logos"
+MAX_LOGO_BYTES = 10 * 1024 * 1024
+# variant -> longest side in pixels (images are only scaled down)
+VARIANTS = {"thumbnail": 256, "print": 1200}
+FORMATS = {"webp": "WEBP", "png": "PNG"}
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_DATA_URL = re.compile(r"^data:(?P<mime>[\w.+-]+/[\w.+-]+)?(?:;[\w-]+=[^;,]*)*(?P<base64>;base64)?,", re.I)
+
+
+class LogoError(ValueError):
+    """The upload is not a usable image (message is shown to the user)."""
+
+
+def is_data_url(value):
+    return bool(value) and bool(_DATA_URL.match(value))
+
+
+def decode_data_url(value):
+    """(mime type, bytes) of a data URL."""
+    match = _DATA_URL.match(value)
+    if not match or not match.group("base64"):
+        raise LogoError("Logo must be a base64 data URL.")
+    try:
+        data = base64.b64decode(value[match.end():], validate=False)
+    except (binascii.Error, ValueError):
+        raise LogoError("Logo is not valid base64.")
+    if not data:
+        raise LogoError("Logo is empty.")
+    if len(data) > MAX_LOGO_BYTES:
+        raise LogoError("Logo is larger than 10 MB.")
+    return (match.group("mime") or "").lower(), data
+
+
+def variant_name(original_name, variant, fmt):
+    """logos/<hash>-original.png -> logos/<hash>-<variant>.<fmt>"""
+    return original_name.rsplit("-", 1)[0] + f"-{variant}.{fmt}"
+
+
+def has_variants(original_name):
+    return not original_name.endswith(".svg")
+
+
+def store(data, mime=""):
+    """
+    Save the original and its variants; returns the stored name of the original.
+    Identical uploads map to the same files, which are only written once.
+    """
+    digest = hashlib.sha256(data).hexdigest()[:20]
+    if mime == "image/svg+xml" or data.lstrip()[:5] in (b"<?xml", b"<svg "):
+        name = f"{LOGO_DIR}/{digest}-original.svg"
+        _save(name, data)
+        return name
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise LogoError("Logo is not a supported image.")
+    ext = (image.format or "png").lower().replace("jpeg", "jpg")
+    name = f"{LOGO_DIR}/{digest}-original.{ext}"
+    _save(name, data)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or "A" in image.mode else "RGB")
+    for variant, size in VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        for fmt, pil_format in FORMATS.items():
+            out = io.BytesIO()
+            options = {"quality": 85, "method": 6} if fmt == "webp" else {"optimize": True}
+            resized.save(out, pil_format, **options)
+            _save(variant_name(name, variant, fmt), out.getvalue())
+    return name
+
+
+def _save(name, data):
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(data))
+
+
+def delete(original_name):
+    """Remove an original and its variants from storage."""
+    if not original_name:
+        return
+    names = [original_name]
+    if has_variants(original_name):
+        names += [variant_name(original_name, v, f) for v in VARIANTS for f in FORMATS]
+    for name in names:
+        default_storage.delete(name)
+
+
+def urls(original_name, request=None):
+    """
+    {"original": url, "thumbnail": {"webp": url, "png": url}, "print": {...}};
+    absolute when a request is given (the frontend is served from another origin).
+    """
+
+    def url(name):
+        path = default_storage.url(name)
+        return request.build_absolute_uri(path) if request is not None else path
+
+    result = {"original": url(original_name)}
+    for variant in VARIANTS:
+        if has_variants(original_name):
+            result[variant] = {fmt: url(variant_name(original_name, variant, fmt)) for fmt in FORMATS}
+        else:
+            result[variant] = {"svg": result["original"]}
+    return result
+
+
+def is_stored_url(original_name, value):
+    """True if value is one of the URLs of this stored logo (the frontend sends it back unchanged)."""
+    if not original_name or not value:
+        return False
+    paths = {urlparse(u).path for u in _flatten(urls(original_name))}
+    return urlparse(value).path in paths
+
+
+def _flatten(url_map):
+    for value in url_map.values():
+        if isinstance(value, dict):
+            yield from value.values()
+        else:
+            yield value
@@ -0,0 +1,94 @@
+"""
+Measure per-message latency of Twilio sends against a local HTTP stub: a fresh Client
+per message (the old send_sms behaviour) versus the cached, connection-pooled client
+from api.sms. Nothing leaves the machine; no database access.
+
+The stub speaks plain HTTP, so only the TCP connect is saved locally; against
+api.twilio.com the TLS handshake is saved as well. --connect-delay adds a fixed cost
+to each new connection to approximate that.
+"""
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from api import sms
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body are separate writes
+    connect_delay = 0.0
+    counter = 0
+
+    def setup(self):
+        super().setup()
+        type(self).counter += 1  # one handler per connection
+        if self.connect_delay:
+            time.sleep(self.connect_delay)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        payload = json.dumps({"sid": "SM" + "0" * 32, "status": "queued"}).encode()
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = "Compare per-message Twilio send latency: fresh client vs cached pooled client (local stub)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=200)
+        parser.add_argument(
+            "--connect-delay", type=float, default=0.0, help="Milliseconds added to each new connection."
+        )
+
+    def handle(self, *args, **options):
+        _StubHandler.connect_delay = options["connect_delay"] / 1000
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = "http://127.0.0.1:%d" % server.server_port
+        config = sms.TwilioConfig("AC" + "0" * 32, "token", "+10000000000")
+        try:
+            for label, get_client in (("fresh client", self._fresh_client), ("cached client", sms.get_client)):
+                connections = _StubHandler.counter
+                timings = self._run(get_client, config, base_url, options["messages"])
+                self.stdout.write(
+                    "%-14s mean %.2f ms  p50 %.2f ms  p95 %.2f ms  connections %d"
+                    % (
+                        label,
+                        statistics.mean(timings),
+                        statistics.median(timings),
+                        statistics.quantiles(timings, n=20)[-1],
+                        _StubHandler.counter - connections,
+                    )
+                )
+        finally:
+            sms.clear_client_cache()
+            server.shutdown()
+
+    @staticmethod
+    def _fresh_client(config):
+        from twilio.rest import Client
+
+        return Client(config.account_sid, config.auth_token)
+
+    @staticmethod
+    def _run(get_client, config, base_url, count):
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            client = get_client(config)
+            client.api.base_url = base_url
+            client.messages.create(body="benchmark", from_=config.from_value, to="+9647700000000")
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
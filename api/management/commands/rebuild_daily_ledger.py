@@ -0,0 +1,16 @@
+"""
+Recompute the DailyLedger voucher rollup from the voucher table.
+"""
+from django.core.management.base import BaseCommand
+
+from api import ledger, versions
+from api.models import DailyLedger
+
+
+class Command(BaseCommand):
+    help = "Drop and rebuild the DailyLedger voucher rollup."
+
+    def handle(self, *args, **options):
+        count = ledger.rebuild()
+        versions.bump(DailyLedger)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {count} ledger rows."))
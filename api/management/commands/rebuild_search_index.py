@@ -0,0 +1,19 @@
+"""
+Rebuild the full-text search index from the current quotations, vouchers,
+contracts and freelance works.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from api import search, versions
+from api.models import SearchDocument
+
+
+class Command(BaseCommand):
+    help = "Drop and rebuild the SQLite FTS5 search index."
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError("Full-text search requires the SQLite database backend.")
+        count = search.rebuild_index()
+        versions.bump(SearchDocument)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} documents."))
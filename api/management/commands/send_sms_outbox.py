@@ -0,0 +1,44 @@
+"""
+Deliver queued SMS (SMSOutbox) through the configured backend. Runs as a long-lived
+worker next to gunicorn; several workers may run at once (rows are leased).
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import sms
+
+
+class Command(BaseCommand):
+    help = "Send queued SMS from the outbox, retrying failures with exponential backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Send what is due now, then exit.")
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument(
+            "--poll-interval", type=float, default=2.0, help="Seconds to sleep when nothing is due."
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=None, help="Parallel sends (default SMS_SEND_CONCURRENCY)."
+        )
+        parser.add_argument(
+            "--max-per-second", type=float, default=None, help="Send rate cap (default SMS_MAX_PER_SECOND)."
+        )
+
+    def handle(self, *args, **options):
+        backend = sms.get_backend()
+        rate = options["max_per_second"]
+        if rate is None:
+            rate = getattr(settings, "SMS_MAX_PER_SECOND", sms.DEFAULT_MAX_PER_SECOND)
+        limiter = sms.RateLimiter(rate)
+        total = 0
+        while True:
+            handled = sms.process_batch(options["batch_size"], backend, options["concurrency"], limiter)
+            total += handled
+            if handled:
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["poll_interval"])
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} messages."))
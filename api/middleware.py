@@ -9,8 +9,11 @@ class ApiKeyMiddleware:
     """
     Reject requests to /api/ that do not send a valid X-API-Key header.
     ALLOWED_API_KEYS is read from settings (comma-separated from .env).
+    Webhooks called by third parties (signed by them instead) are exempt.
     """
 
+    exempt_paths = ("/api/sms/status-callback/",)
+
     def __init__(self, get_response):
         self.get_response = get_response
         self.allowed_keys = set(
@@ -20,7 +23,7 @@ class ApiKeyMiddleware:
         )
 
     def __call__(self, request):
-        if not request.path.startswith("/api/"):
+        if not request.path.startswith("/api/") or request.path in self.exempt_paths:
             return self.get_response(request)
 
         api_key = request.headers.get("X-API-Key") or request.META.get("HTTP_X_API_KEY")
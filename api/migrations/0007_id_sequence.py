@@ -0,0 +1,53 @@
+# Per-prefix ID counters, seeded from the highest PREFIX-NNNN already stored
+
+import re
+
+from django.db import migrations, models
+
+MIN_START_NUMBER = 5000
+
+# prefix -> model, as used by api.serializers
+ID_PREFIXES = {
+    "QT": "Quotation",
+    "QI": "QuotationItem",
+    "VC": "Voucher",
+    "CN": "Contract",
+    "CL": "ContractClause",
+    "FL": "Freelancer",
+    "WK": "FreelanceWork",
+    "SL": "SMSLog",
+}
+
+
+def seed_sequences(apps, schema_editor):
+    IdSequence = apps.get_model("api", "IdSequence")
+    for prefix, model_name in ID_PREFIXES.items():
+        model = apps.get_model("api", model_name)
+        pattern = re.compile(r"^%s-(\d+)$" % re.escape(prefix))
+        last_value = MIN_START_NUMBER - 1
+        for pk in model.objects.filter(pk__startswith=f"{prefix}-").values_list("pk", flat=True).iterator():
+            match = pattern.match(pk)
+            if match:
+                last_value = max(last_value, int(match.group(1)))
+        IdSequence.objects.update_or_create(prefix=prefix, defaults={"last_value": last_value})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_freelance_models"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdSequence",
+            fields=[
+                ("prefix", models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ("last_value", models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                "db_table": "api_id_sequence",
+            },
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
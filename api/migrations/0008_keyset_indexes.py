@@ -0,0 +1,32 @@
+# Indexes backing keyset (cursor) pagination of vouchers, SMS logs and freelance works
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_id_sequence"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="freelancework",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="voucher",
+            index=models.Index(fields=["created_at", "id"], name="api_voucher_created_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="freelancework",
+            index=models.Index(fields=["created_at", "id"], name="api_fwork_created_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="smslog",
+            index=models.Index(fields=["timestamp", "id"], name="api_smslog_ts_id_idx"),
+        ),
+    ]
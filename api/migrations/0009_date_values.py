@@ -0,0 +1,66 @@
+# Parsed, indexed date_value next to each display date string, backfilled from it
+
+import re
+
+from dateutil import parser
+from django.db import migrations, models
+
+DATED_MODELS = ["Quotation", "Voucher", "Contract", "FreelanceWork"]
+BATCH_SIZE = 1000
+
+# A frozen copy of api.date_utils.parse_display_date, so later changes there do not alter this migration.
+_DIGITS = {ord(c): str(i) for i, c in enumerate("٠١٢٣٤٥٦٧٨٩")}
+_DIGITS.update({ord(c): str(i) for i, c in enumerate("۰۱۲۳۴۵۶۷۸۹")})
+_MARKS = re.compile("[\u200e\u200f\u061c\u202a-\u202e]")
+_YEAR_FIRST = re.compile(r"^\d{4}[-/.]")
+
+
+def parse_display_date(value):
+    if not value:
+        return None
+    text = _MARKS.sub("", str(value)).translate(_DIGITS).replace("\u060c", ",").strip()
+    if not text:
+        return None
+    year_first = bool(_YEAR_FIRST.match(text))
+    try:
+        return parser.parse(text, dayfirst=not year_first, yearfirst=year_first).date()
+    except (ValueError, OverflowError):
+        return None
+
+
+def backfill_date_values(apps, schema_editor):
+    for model_name in DATED_MODELS:
+        model = apps.get_model("api", model_name)
+        batch = []
+        for obj in model.objects.only("pk", "date").iterator(chunk_size=BATCH_SIZE):
+            obj.date_value = parse_display_date(obj.date)
+            if obj.date_value is not None:
+                batch.append(obj)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, ["date_value"])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ["date_value"])
+
+
+def date_value_field():
+    return models.DateField(blank=True, db_index=True, editable=False, null=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(model_name="quotation", name="date_value", field=date_value_field()),
+        migrations.AddField(model_name="voucher", name="date_value", field=date_value_field()),
+        migrations.AddField(model_name="contract", name="date_value", field=date_value_field()),
+        migrations.AddField(model_name="freelancework", name="date_value", field=date_value_field()),
+        migrations.RunPython(backfill_date_values, migrations.RunPython.noop),
+        migrations.AlterModelOptions(
+            name="freelancework",
+            options={"ordering": ["-date_value", "id"]},
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_date_values'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['status', 'created_at'], name='api_contr_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quotation',
+            index=models.Index(fields=['status', 'created_at'], name='api_quot_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quotation',
+            index=models.Index(fields=['currency', 'date_value'], name='api_quot_cur_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voucher',
+            index=models.Index(fields=['category', 'created_at'], name='api_voucher_cat_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voucher',
+            index=models.Index(fields=['type', 'currency', 'date_value'], name='api_voucher_type_cur_date_idx'),
+        ),
+    ]
@@ -0,0 +1,103 @@
+# SQLite FTS5 full-text search index, filled from the existing rows
+
+import re
+
+from django.db import migrations, models
+
+# A frozen copy of what api.search indexes, so later changes there do not alter this migration.
+FTS_TABLE = "api_search_index"
+CREATE_FTS_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+    "USING fts5(title, body, tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+_ARABIC_CHARS = str.maketrans(
+    {
+        "أ": "ا",
+        "إ": "ا",
+        "آ": "ا",
+        "ٱ": "ا",
+        "ى": "ي",
+        "ئ": "ي",
+        "ة": "ه",
+        "ؤ": "و",
+        **{chr(0x0660 + i): str(i) for i in range(10)},
+        **{chr(0x06F0 + i): str(i) for i in range(10)},
+    }
+)
+_ARABIC_MARKS = re.compile("[\u064b-\u065f\u0670\u0640]")
+_ARABIC_ARTICLE = re.compile(r"\b(?:و?ال)(?=\w{2,})")
+
+
+def normalize_arabic(text):
+    text = _ARABIC_MARKS.sub("", text or "").translate(_ARABIC_CHARS)
+    return _ARABIC_ARTICLE.sub("", text)
+
+
+def documents(apps):
+    """(kind, object id, title, body, category) for every indexed row."""
+    for quotation in apps.get_model("api", "Quotation").objects.prefetch_related("items").iterator(chunk_size=500):
+        items = " ".join(i.description for i in quotation.items.all())
+        body = " ".join([quotation.client_phone, quotation.note, items])
+        yield "quotation", quotation.pk, quotation.client_name, body, ""
+    for voucher in apps.get_model("api", "Voucher").objects.iterator(chunk_size=500):
+        body = " ".join([voucher.party_phone, voucher.description])
+        yield "voucher", voucher.pk, voucher.party_name, body, voucher.category
+    contracts = apps.get_model("api", "Contract").objects.prefetch_related("clause_links__clause")
+    for contract in contracts.iterator(chunk_size=500):
+        clauses = " ".join(f"{link.clause.title} {link.clause.content}" for link in contract.clause_links.all())
+        parties = " ".join(
+            [contract.party_a_name, contract.party_a_title, contract.party_b_name, contract.party_b_title]
+        )
+        yield "contract", contract.pk, contract.subject, f"{parties} {clauses}", ""
+    works = apps.get_model("api", "FreelanceWork").objects.select_related("freelancer")
+    for work in works.iterator(chunk_size=500):
+        yield "freelance_work", work.pk, work.freelancer.name, work.description, ""
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(CREATE_FTS_TABLE)
+    SearchDocument = apps.get_model("api", "SearchDocument")
+    with schema_editor.connection.cursor() as cursor:
+        for kind, object_id, title, body, category in documents(apps):
+            doc = SearchDocument.objects.create(
+                kind=kind, object_id=object_id, category=category or "", title=title[:500]
+            )
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)",
+                [doc.pk, normalize_arabic(title), normalize_arabic(body)],
+            )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0010_list_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("kind", models.CharField(max_length=20)),
+                ("object_id", models.CharField(max_length=36)),
+                ("category", models.CharField(blank=True, max_length=20)),
+                ("title", models.CharField(blank=True, max_length=500)),
+            ],
+            options={
+                "db_table": "api_search_document",
+                "constraints": [
+                    models.UniqueConstraint(fields=("kind", "object_id"), name="api_search_doc_kind_obj_uniq"),
+                ],
+            },
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
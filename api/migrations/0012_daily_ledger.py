@@ -0,0 +1,63 @@
+# Daily voucher rollup, filled from the existing vouchers
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def fill_ledger(apps, schema_editor):
+    Voucher = apps.get_model("api", "Voucher")
+    DailyLedger = apps.get_model("api", "DailyLedger")
+    rows = (
+        Voucher.objects.annotate(day=Coalesce("date_value", TruncDate("created_at")))
+        .values("day", "currency", "type", "category")
+        .annotate(total=Sum("amount"), count=Count("pk"))
+        .order_by()
+    )
+    DailyLedger.objects.bulk_create([DailyLedger(**row) for row in rows], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0011_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyLedger",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField()),
+                ("currency", models.CharField(max_length=3)),
+                ("type", models.CharField(choices=[("RECEIPT", "قبض"), ("PAYMENT", "صرف")], max_length=20)),
+                (
+                    "category",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("SALARY", "راتب"),
+                            ("DAILY", "يومي"),
+                            ("GENERAL", "عام"),
+                            ("VOUCHER", "وصل"),
+                            ("OWNER_WITHDRAWAL", "سحب مالك"),
+                            ("FREELANCE", "فري لانس"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("total", models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ("count", models.IntegerField(default=0)),
+            ],
+            options={
+                "db_table": "api_daily_ledger",
+                "ordering": ["day"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "currency", "type", "category"), name="api_daily_ledger_key_uniq"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(fill_ledger, migrations.RunPython.noop),
+    ]
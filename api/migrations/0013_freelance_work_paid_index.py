@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_daily_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='freelancework',
+            index=models.Index(fields=['freelancer', 'is_paid'], name='api_fwork_freelancer_paid_idx'),
+        ),
+    ]
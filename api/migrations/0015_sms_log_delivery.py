@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_sms_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='smslog',
+            name='delivery_error_code',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='smslog',
+            name='delivery_status',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='smslog',
+            name='delivery_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='smslog',
+            name='sid',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='smslog',
+            index=models.Index(fields=['sid'], name='api_smslog_sid_idx'),
+        ),
+    ]
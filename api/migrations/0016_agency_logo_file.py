@@ -0,0 +1,93 @@
+# Agency logo moves out of the settings row: base64 data URLs are decoded into stored files
+
+import base64
+import binascii
+import hashlib
+import io
+import re
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+from PIL import Image, UnidentifiedImageError
+
+# A frozen copy of what api.logos stores, so later changes there do not alter this migration.
+LOGO_DIR = "logos"
+MAX_LOGO_BYTES = 10 * 1024 * 1024
+VARIANTS = {"thumbnail": 256, "print": 1200}
+FORMATS = {"webp": "WEBP", "png": "PNG"}
+
+_DATA_URL = re.compile(r"^data:(?P<mime>[\w.+-]+/[\w.+-]+)?(?:;[\w-]+=[^;,]*)*(?P<base64>;base64)?,", re.I)
+
+
+def decode_data_url(value):
+    """(mime type, bytes) of a data URL, or None if it does not hold a usable payload."""
+    match = _DATA_URL.match(value)
+    if not match or not match.group("base64"):
+        return None
+    try:
+        data = base64.b64decode(value[match.end():], validate=False)
+    except (binascii.Error, ValueError):
+        return None
+    if not data or len(data) > MAX_LOGO_BYTES:
+        return None
+    return (match.group("mime") or "").lower(), data
+
+
+def save(name, data):
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(data))
+
+
+def store(data, mime):
+    """Stored name of the original (saved with its resized variants), or None if it is not an image."""
+    digest = hashlib.sha256(data).hexdigest()[:20]
+    if mime == "image/svg+xml" or data.lstrip()[:5] in (b"<?xml", b"<svg "):
+        name = f"{LOGO_DIR}/{digest}-original.svg"
+        save(name, data)
+        return name
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        return None
+    ext = (image.format or "png").lower().replace("jpeg", "jpg")
+    name = f"{LOGO_DIR}/{digest}-original.{ext}"
+    save(name, data)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or "A" in image.mode else "RGB")
+    for variant, size in VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        for fmt, pil_format in FORMATS.items():
+            out = io.BytesIO()
+            options = {"quality": 85, "method": 6} if fmt == "webp" else {"optimize": True}
+            resized.save(out, pil_format, **options)
+            save(f"{LOGO_DIR}/{digest}-{variant}.{fmt}", out.getvalue())
+    return name
+
+
+def store_logos(apps, schema_editor):
+    AgencySettings = apps.get_model("api", "AgencySettings")
+    for settings_obj in AgencySettings.objects.filter(logo__startswith="data:").only("id", "logo"):
+        decoded = decode_data_url(settings_obj.logo)
+        name = store(decoded[1], decoded[0]) if decoded else None
+        if name is None:
+            continue  # not an image; left as it was
+        AgencySettings.objects.filter(pk=settings_obj.pk).update(logo="", logo_file=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0015_sms_log_delivery"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="agencysettings",
+            name="logo_file",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(store_logos, migrations.RunPython.noop),
+    ]
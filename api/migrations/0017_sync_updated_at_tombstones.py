@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:20
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Existing rows get their creation time; Freelancer has none and keeps the migration time.
+    for model_name, source in (
+        ("Quotation", "created_at"),
+        ("Voucher", "created_at"),
+        ("Contract", "created_at"),
+        ("FreelanceWork", "created_at"),
+        ("SMSLog", "timestamp"),
+    ):
+        apps.get_model("api", model_name).objects.update(updated_at=F(source))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_agency_logo_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('object_id', models.CharField(max_length=36)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'api_tombstone',
+                'ordering': ['deleted_at', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='freelancer',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='freelancework',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='quotation',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='smslog',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='voucher',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['updated_at', 'id'], name='api_contr_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='freelancer',
+            index=models.Index(fields=['updated_at', 'id'], name='api_freelancer_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='freelancework',
+            index=models.Index(fields=['updated_at', 'id'], name='api_fwork_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quotation',
+            index=models.Index(fields=['updated_at', 'id'], name='api_quot_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='smslog',
+            index=models.Index(fields=['updated_at', 'id'], name='api_smslog_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voucher',
+            index=models.Index(fields=['updated_at', 'id'], name='api_voucher_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='api_tombstone_deleted_id_idx'),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
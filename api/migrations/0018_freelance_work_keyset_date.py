@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_sync_updated_at_tombstones'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='freelancework',
+            options={'ordering': [models.OrderBy(models.F('date_value'), descending=True, nulls_last=True), 'id']},
+        ),
+        migrations.RemoveIndex(
+            model_name='freelancework',
+            name='api_fwork_created_id_idx',
+        ),
+        migrations.AddIndex(
+            model_name='freelancework',
+            index=models.Index(fields=['date_value', 'id'], name='api_fwork_date_id_idx'),
+        ),
+    ]
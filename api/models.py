@@ -5,8 +5,11 @@ Aligned with frontend types (User, Quotation, Voucher, Contract, AgencySettings)
 import uuid
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .date_utils import parse_display_date
+
 
 class User(AbstractUser):
     """Custom user with role (ADMIN / ACCOUNTANT)."""
@@ -26,6 +29,32 @@ class User(AbstractUser):
         return self.username
 
 
+class IdSequence(models.Model):
+    """Per-prefix counter for human-readable IDs (QT-5000, VC-5001, ...)."""
+
+    prefix = models.CharField(primary_key=True, max_length=10)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        db_table = "api_id_sequence"
+
+    def __str__(self):
+        return f"{self.prefix}-{self.last_value}"
+
+
+class ModelVersion(models.Model):
+    """Change counter per model label ("api.voucher"), see api/versions.py."""
+
+    label = models.CharField(primary_key=True, max_length=100)
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        db_table = "api_model_version"
+
+    def __str__(self):
+        return f"{self.label}={self.version}"
+
+
 class ServiceDefinition(models.Model):
     """Inline service definition for agency settings (name, description)."""
 
@@ -40,7 +69,8 @@ class AgencySettings(models.Model):
     """Singleton-like agency settings (v4: + twilio, exchange_rate)."""
 
     name = models.CharField(max_length=255)
-    logo = models.TextField(blank=True)  # URL or base64 data URL (for uploaded images)
+    logo = models.TextField(blank=True)  # external logo URL; uploads are stored in logo_file
+    logo_file = models.CharField(max_length=255, blank=True)  # storage name, see api.logos
     address = models.CharField(max_length=500, blank=True)
     phone = models.CharField(max_length=50, blank=True)
     email = models.EmailField(blank=True)
@@ -68,6 +98,25 @@ class AgencySettingsService(models.Model):
         db_table = "api_agency_settings_service"
 
 
+class DisplayDateModel(models.Model):
+    """
+    Base for models whose `date` is a frontend locale string: keeps a parsed,
+    indexed copy in `date_value` for range filters and ordering.
+    """
+
+    date_value = models.DateField(null=True, blank=True, editable=False, db_index=True)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.date_value = parse_display_date(self.date)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "date" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "date_value"}
+        super().save(*args, **kwargs)
+
+
 class ServiceItem(models.Model):
     """Line item for a quotation (description, price, quantity)."""
 
@@ -80,7 +129,7 @@ class ServiceItem(models.Model):
         db_table = "api_service_item"
 
 
-class Quotation(models.Model):
+class Quotation(DisplayDateModel):
     """Quotation: client, date, items, total, status, note (v4: client_phone, currency)."""
 
     class Status(models.TextChoices):
@@ -97,10 +146,16 @@ class Quotation(models.Model):
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
     note = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "api_quotation"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["updated_at", "id"], name="api_quot_updated_id_idx"),
+            models.Index(fields=["status", "created_at"], name="api_quot_status_created_idx"),
+            models.Index(fields=["currency", "date_value"], name="api_quot_cur_date_idx"),
+        ]
 
 
 class QuotationItem(models.Model):
@@ -117,7 +172,7 @@ class QuotationItem(models.Model):
         db_table = "api_quotation_item"
 
 
-class Voucher(models.Model):
+class Voucher(DisplayDateModel):
     """Voucher (v4): type RECEIPT/PAYMENT, currency, party_phone, category."""
 
     class VoucherType(models.TextChoices):
@@ -142,10 +197,41 @@ class Voucher(models.Model):
     party_phone = models.CharField(max_length=50, blank=True)
     category = models.CharField(max_length=20, choices=Category.choices, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "api_voucher"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["updated_at", "id"], name="api_voucher_updated_id_idx"),
+            models.Index(fields=["created_at", "id"], name="api_voucher_created_id_idx"),
+            models.Index(fields=["category", "created_at"], name="api_voucher_cat_created_idx"),
+            models.Index(fields=["type", "currency", "date_value"], name="api_voucher_type_cur_date_idx"),
+        ]
+
+
+class DailyLedger(models.Model):
+    """
+    Voucher rollup: amount sum and count per (day, currency, type, category).
+    Kept current on every voucher save/delete (see api.ledger); day is the voucher's
+    parsed date, or its creation date when the display date cannot be parsed.
+    """
+
+    day = models.DateField()
+    currency = models.CharField(max_length=3)
+    type = models.CharField(max_length=20, choices=Voucher.VoucherType.choices)
+    category = models.CharField(max_length=20, choices=Voucher.Category.choices, blank=True)
+    total = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "api_daily_ledger"
+        ordering = ["day"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "currency", "type", "category"], name="api_daily_ledger_key_uniq"
+            ),
+        ]
 
 
 class ContractClause(models.Model):
@@ -159,7 +245,7 @@ class ContractClause(models.Model):
         db_table = "api_contract_clause"
 
 
-class Contract(models.Model):
+class Contract(DisplayDateModel):
     """Contract (v4): status ACTIVE/ARCHIVED, currency."""
 
     class Status(models.TextChoices):
@@ -177,10 +263,15 @@ class Contract(models.Model):
     currency = models.CharField(max_length=3, default="IQD")
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.ACTIVE)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "api_contract"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["updated_at", "id"], name="api_contr_updated_id_idx"),
+            models.Index(fields=["status", "created_at"], name="api_contr_status_created_idx"),
+        ]
 
 
 class ContractClauseLink(models.Model):
@@ -206,16 +297,20 @@ class Freelancer(models.Model):
     name = models.CharField(max_length=255)
     phone = models.CharField(max_length=50)
     role = models.CharField(max_length=20, choices=Role.choices, default=Role.PHOTOGRAPHER)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "api_freelancer"
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["updated_at", "id"], name="api_freelancer_updated_id_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class FreelanceWork(models.Model):
+class FreelanceWork(DisplayDateModel):
     """A single freelance work item (piece) linked to a freelancer."""
 
     id = models.CharField(primary_key=True, max_length=36, editable=False)
@@ -226,17 +321,24 @@ class FreelanceWork(models.Model):
     currency = models.CharField(max_length=3, default="IQD")
     is_paid = models.BooleanField(default=False)
     payment_id = models.CharField(max_length=36, blank=True)  # voucher id when paid
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "api_freelance_work"
-        ordering = ["-date", "id"]
+        ordering = [models.F("date_value").desc(nulls_last=True), "id"]
+        indexes = [
+            models.Index(fields=["updated_at", "id"], name="api_fwork_updated_id_idx"),
+            models.Index(fields=["date_value", "id"], name="api_fwork_date_id_idx"),
+            models.Index(fields=["freelancer", "is_paid"], name="api_fwork_freelancer_paid_idx"),
+        ]
 
     def __str__(self):
         return f"{self.description[:50]} ({self.freelancer.name})"
 
 
 class SMSLog(models.Model):
-    """SMS log (v4): to, body, status, timestamp, error."""
+    """SMS log (v4): to, body, status, timestamp, error; delivery state from Twilio callbacks."""
 
     class LogStatus(models.TextChoices):
         SUCCESS = "SUCCESS", _("Success")
@@ -248,7 +350,90 @@ class SMSLog(models.Model):
     status = models.CharField(max_length=20, choices=LogStatus.choices)
     timestamp = models.DateTimeField(auto_now_add=True)
     error = models.TextField(blank=True)
+    # Twilio message sid and the latest delivery state from its status callback
+    sid = models.CharField(max_length=64, blank=True)
+    delivery_status = models.CharField(max_length=20, blank=True)  # queued, sent, delivered, undelivered, failed
+    delivery_error_code = models.CharField(max_length=10, blank=True)
+    delivery_updated_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = "api_sms_log"
         ordering = ["-timestamp"]
+        indexes = [
+            models.Index(fields=["updated_at", "id"], name="api_smslog_updated_id_idx"),
+            models.Index(fields=["timestamp", "id"], name="api_smslog_ts_id_idx"),
+            models.Index(fields=["sid"], name="api_smslog_sid_idx"),
+        ]
+
+
+class SMSOutbox(models.Model):
+    """Queued SMS, delivered by the send_sms_outbox worker with retries (see api.sms)."""
+
+    class OutboxStatus(models.TextChoices):
+        PENDING = "PENDING", _("Pending")
+        SENDING = "SENDING", _("Sending")
+        SENT = "SENT", _("Sent")
+        FAILED = "FAILED", _("Failed")
+
+    to = models.CharField(max_length=50)
+    body = models.TextField()
+    status = models.CharField(max_length=20, choices=OutboxStatus.choices, default=OutboxStatus.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)  # lease of the worker that claimed it
+    claim_token = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+    sid = models.CharField(max_length=64, blank=True)  # Twilio message sid once sent
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "api_sms_outbox"
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="api_sms_outbox_due_idx"),
+        ]
+
+
+class SearchDocument(models.Model):
+    """
+    One row per searchable object; its id is the rowid of the matching entry in the
+    SQLite FTS5 table api_search_index (see api.search), so an object's entry can be
+    replaced or removed through this indexed (kind, object_id) lookup.
+    """
+
+    kind = models.CharField(max_length=20)
+    object_id = models.CharField(max_length=36)
+    category = models.CharField(max_length=20, blank=True)  # voucher category, for role filtering
+    title = models.CharField(max_length=500, blank=True)  # display title (not normalized)
+
+    class Meta:
+        db_table = "api_search_document"
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="api_search_doc_kind_obj_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id}"
+
+
+class Tombstone(models.Model):
+    """
+    A deleted business row, kept so /api/sync/ can tell clients to drop it.
+    kind is the sync collection name ("quotations", "freelanceWorks", ...).
+    """
+
+    kind = models.CharField(max_length=20)
+    object_id = models.CharField(max_length=36)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "api_tombstone"
+        ordering = ["deleted_at", "id"]
+        indexes = [
+            models.Index(fields=["deleted_at", "id"], name="api_tombstone_deleted_id_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id}"
@@ -0,0 +1,124 @@
+"""
+Pagination for Point Digital Marketing Manager API.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination by default; keyset (cursor) pagination when the client sends
+    ?cursor= (empty for the first page). Keyset pages are keyed on the view's
+    `keyset_ordering`, e.g. ("-created_at", "-id"), and filter with
+    WHERE (a, b) < (cursor_a, cursor_b) instead of OFFSET, so deep pages cost the same
+    as the first one. COUNT(*) only runs when the client also sends ?count=true.
+    Nullable keyset fields sort their NULLs last in either direction, as the model
+    ordering they mirror does. ?page_size= (up to max_page_size) sets the page size in
+    both modes.
+    """
+
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        fields = [(f.lstrip("-"), f.startswith("-")) for f in view.keyset_ordering]
+        self.count = None
+        if request.query_params.get(self.count_query_param, "").lower() in ("true", "1", "yes"):
+            self.count = queryset.count()
+
+        token = request.query_params.get(self.cursor_query_param)
+        queryset = queryset.order_by(*self._order_by(queryset.model, fields))
+        if token:
+            queryset = queryset.filter(self._after(queryset.model, fields, self._decode(token)))
+        rows = list(queryset[: page_size + 1])
+        self.next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            # rows are model instances, or dicts for pages rendered from .values()
+            values = [last[name] if isinstance(last, dict) else getattr(last, name) for name, _ in fields]
+            self.next_cursor = self._encode(values)
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        payload = {"next": self.get_next_link(), "results": data}
+        if self.count is not None:
+            payload = {"count": self.count, **payload}
+        return Response(payload)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.count_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    @staticmethod
+    def _order_by(model, fields):
+        order = []
+        for name, descending in fields:
+            if model._meta.get_field(name).null:
+                order.append(F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_last=True))
+            else:
+                order.append(f"-{name}" if descending else name)
+        return order
+
+    @staticmethod
+    def _after(model, fields, values):
+        """Q for rows strictly after `values` in the given (name, descending) ordering, NULLs last."""
+        if len(values) != len(fields):
+            raise NotFound("Invalid cursor.")
+        try:
+            values = [model._meta.get_field(name).to_python(v) for (name, _), v in zip(fields, values)]
+        except ValidationError:
+            raise NotFound("Invalid cursor.")
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(fields, values):
+            if value is None:
+                # nothing sorts after NULL in this field, only ties continue
+                equal &= Q(**{f"{name}__isnull": True})
+                continue
+            lookup = "lt" if descending else "gt"
+            after = Q(**{f"{name}__{lookup}": value})
+            if model._meta.get_field(name).null:
+                after |= Q(**{f"{name}__isnull": True})
+            condition |= equal & after
+            equal &= Q(**{name: value})
+        return condition
+
+    @staticmethod
+    def _encode(values):
+        raw = json.dumps([v.isoformat() if hasattr(v, "isoformat") else v for v in values])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def _decode(token):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+        except (ValueError, UnicodeError):
+            raise NotFound("Invalid cursor.")
+        if not isinstance(values, list):
+            raise NotFound("Invalid cursor.")
+        return values
@@ -0,0 +1,126 @@
+"""
+Voucher reports computed from the DailyLedger rollup instead of raw voucher rows.
+The rollup already holds totals per (day, currency, type, category); the few
+hundred rows a period covers are folded here into per-currency, per-category,
+per-month and per-year views.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from .models import Voucher
+
+MONEY = Decimal("0.01")
+CONVERTIBLE_CURRENCIES = ("IQD", "USD")
+
+
+def format_money(value):
+    """Decimal string with two places, as DRF renders DecimalField values."""
+    return str(Decimal(value).quantize(MONEY))
+
+
+def ledger_day_totals(queryset):
+    """Rows of day, currency, type, category, total, count from a DailyLedger queryset."""
+    return list(
+        queryset.filter(count__gt=0)
+        .values("day", "currency", "type", "category", "total", "count")
+        .order_by()
+    )
+
+
+def convert_amount(amount, currency, target, exchange_rate):
+    """Convert between IQD and USD with exchange_rate (IQD per 1 USD); None if not possible."""
+    if currency == target:
+        return amount
+    if not exchange_rate or {currency, target} != set(CONVERTIBLE_CURRENCIES):
+        return None
+    return amount / exchange_rate if target == "USD" else amount * exchange_rate
+
+
+class _Totals:
+    __slots__ = ("receipts", "payments", "owner_withdrawals", "count")
+
+    def __init__(self):
+        self.receipts = Decimal("0")
+        self.payments = Decimal("0")
+        self.owner_withdrawals = Decimal("0")
+        self.count = 0
+
+    def add(self, row, amount=None):
+        amount = row["total"] if amount is None else amount
+        if row["type"] == Voucher.VoucherType.RECEIPT:
+            self.receipts += amount
+        else:
+            self.payments += amount
+        if row["category"] == Voucher.Category.OWNER_WITHDRAWAL:
+            self.owner_withdrawals += amount
+        self.count += row["count"]
+
+    def as_dict(self, **extra):
+        return {
+            **extra,
+            "receipts": format_money(self.receipts),
+            "payments": format_money(self.payments),
+            "net": format_money(self.receipts - self.payments),
+            "ownerWithdrawals": format_money(self.owner_withdrawals),
+            "count": self.count,
+        }
+
+
+def summarize(rows, convert_to=None, exchange_rate=None):
+    """
+    Fold rollup rows (see ledger_day_totals) into the summary payload.
+    Receipts and payments are per voucher type; net = receipts - payments;
+    ownerWithdrawals is the OWNER_WITHDRAWAL share (already part of payments/receipts).
+    """
+    by_currency = defaultdict(_Totals)
+    by_month = defaultdict(_Totals)
+    by_year = defaultdict(_Totals)
+    by_category = defaultdict(lambda: [Decimal("0"), 0])
+    converted = _Totals()
+    unconverted = set()
+    for row in rows:
+        month = row["day"].strftime("%Y-%m") if row["day"] else None
+        by_currency[row["currency"]].add(row)
+        by_month[(month or "", row["currency"])].add(row)
+        by_year[(month[:4] if month else "", row["currency"])].add(row)
+        category = by_category[(row["currency"], row["type"], row["category"])]
+        category[0] += row["total"]
+        category[1] += row["count"]
+        if convert_to:
+            amount = convert_amount(row["total"], row["currency"], convert_to, exchange_rate)
+            if amount is None:
+                unconverted.add(row["currency"])
+            else:
+                converted.add(row, amount)
+
+    summary = {
+        "byCurrency": [
+            totals.as_dict(currency=currency)
+            for currency, totals in sorted(by_currency.items())
+        ],
+        "byCategory": [
+            {
+                "currency": currency,
+                "type": voucher_type,
+                "category": category,
+                "total": format_money(total),
+                "count": count,
+            }
+            for (currency, voucher_type, category), (total, count) in sorted(by_category.items())
+        ],
+        "byMonth": [
+            totals.as_dict(month=month or None, currency=currency)
+            for (month, currency), totals in sorted(by_month.items())
+        ],
+        "byYear": [
+            totals.as_dict(year=year or None, currency=currency)
+            for (year, currency), totals in sorted(by_year.items())
+        ],
+    }
+    if convert_to:
+        summary["converted"] = converted.as_dict(
+            currency=convert_to,
+            exchangeRate=float(exchange_rate) if exchange_rate else None,
+            unconvertedCurrencies=sorted(unconverted),
+        )
+    return summary
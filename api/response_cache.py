@@ -0,0 +1,138 @@
+"""
+Conditional GETs and an opt-in response cache, both driven by model change versions.
+
+A response is identified by the host, path, query string, renderer and the user's role
+(querysets differ by role, e.g. accountants never see OWNER_WITHDRAWAL vouchers)
+together with the change versions of the models it is built from (api.versions).
+The digest of those parts is
+
+- the strong ETag: a matching If-None-Match gets 304 before the resource is queried or
+  serialized, and
+- the key of the cached response data in the shared Django cache. A write bumps a
+  version, so stale entries are never looked up again and expire after
+  RESPONSE_CACHE_SECONDS.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from . import versions
+
+KEY_PREFIX = "api_response:"
+DEFAULT_TIMEOUT = 300
+
+
+def role_of(user):
+    return getattr(user, "role", None) or "-"
+
+
+def response_digest(request, models, *extra):
+    """Digest of everything a GET response depends on; costs one small version query."""
+    model_versions = versions.get_versions(*models)
+    renderer = getattr(request, "accepted_renderer", None)
+    parts = [
+        request.get_host(),
+        request.get_full_path(),
+        role_of(request.user),
+        getattr(renderer, "format", ""),
+        *(f"{label}={version}" for label, version in sorted(model_versions.items())),
+        *map(str, extra),
+    ]
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    tags = parse_etags(header)
+    # If-None-Match uses the weak comparison: W/"x" matches "x". "*" only matches a
+    # representation that exists, which is not known before the lookup, so it is ignored.
+    return etag in tags or f"W/{etag}" in tags
+
+
+def conditional(request, models, build, *extra, cache_data=False):
+    """
+    Answer a GET with 304 when If-None-Match carries the current ETag; otherwise return
+    build() (optionally from the response cache). extra adds parts to the digest, e.g.
+    the user id for per-user resources.
+    """
+    if request.method not in ("GET", "HEAD") or not models:
+        return build()
+    digest = response_digest(request, models, *extra)
+    etag = f'"{digest[:32]}"'
+    if _etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = _cached(f"{KEY_PREFIX}{digest}", build) if cache_data else build()
+    if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"  # browsers revalidate every time
+        patch_vary_headers(response, ("Authorization",))
+    return response
+
+
+def _cached(key, build):
+    timeout = getattr(settings, "RESPONSE_CACHE_SECONDS", DEFAULT_TIMEOUT)
+    if not timeout:
+        return build()
+    data = cache.get(key)
+    if data is not None:
+        return Response(data)
+    response = build()
+    if response.status_code == status.HTTP_200_OK:
+        cache.set(key, response.data, timeout)
+    return response
+
+
+def conditional_get(*models, per_user=False):
+    """
+    ETags for a function view or viewset action built from the given models.
+    per_user adds the user id to the digest, for responses about the current user.
+    """
+
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(*args, **kwargs):
+            request = next(a for a in args if isinstance(a, Request))
+            extra = [request.user.pk] if per_user else []
+            return conditional(request, models, lambda: handler(*args, **kwargs), *extra)
+
+        return wrapper
+
+    return decorator
+
+
+class CachedResponseMixin:
+    """
+    ETags (and 304s) for list/retrieve, and their response data served from the cache.
+    Set cache_models to every model the response reads (the viewset's own model
+    included); cache_responses = False keeps the ETags but skips the data cache.
+    Permissions still run on every request; only role-dependent data may be cached.
+    """
+
+    cache_models = ()
+    cache_responses = True
+
+    def list(self, request, *args, **kwargs):
+        return conditional(
+            request,
+            self.cache_models,
+            lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs),
+            cache_data=self.cache_responses,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional(
+            request,
+            self.cache_models,
+            lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs),
+            cache_data=self.cache_responses,
+        )
@@ -0,0 +1,186 @@
+"""
+Full-text search over quotations, vouchers, contracts and freelance works using an
+SQLite FTS5 virtual table (api_search_index) next to the regular tables.
+
+Each object is one document: quotations include their items, contracts their
+clauses. Text is normalized (Arabic alef/ya/ta-marbuta variants, harakat, tatweel,
+Arabic-Indic digits) both when indexed and when searched. On other database
+backends the index is a no-op and search() is unavailable.
+"""
+import re
+from functools import partial
+
+from django.apps import apps as django_apps
+from django.db import connection, transaction
+
+FTS_TABLE = "api_search_index"  # created by migration 0011
+
+# kind -> model name
+KINDS = {
+    "quotation": "Quotation",
+    "voucher": "Voucher",
+    "contract": "Contract",
+    "freelance_work": "FreelanceWork",
+}
+
+_ARABIC_CHARS = str.maketrans(
+    {
+        "أ": "ا",
+        "إ": "ا",
+        "آ": "ا",
+        "ٱ": "ا",
+        "ى": "ي",
+        "ئ": "ي",
+        "ة": "ه",
+        "ؤ": "و",
+        **{chr(0x0660 + i): str(i) for i in range(10)},
+        **{chr(0x06F0 + i): str(i) for i in range(10)},
+    }
+)
+# harakat, superscript alef and tatweel
+_ARABIC_MARKS = re.compile("[\u064b-\u065f\u0670\u0640]")
+# definite article (optionally with wa-) at the start of a word of 2+ more letters
+_ARABIC_ARTICLE = re.compile(r"\b(?:و?ال)(?=\w{2,})")
+
+
+def normalize_arabic(text):
+    """
+    Fold Arabic spelling variants and drop the definite article, so that e.g.
+    "الشركة" matches "شركه" and "إيجار" matches "الايجار".
+    """
+    text = _ARABIC_MARKS.sub("", text or "").translate(_ARABIC_CHARS)
+    return _ARABIC_ARTICLE.sub("", text)
+
+
+def is_available():
+    return connection.vendor == "sqlite"
+
+
+def _document(kind, obj):
+    """(title, body, category) for an object of the given kind."""
+    if kind == "quotation":
+        items = " ".join(i.description for i in obj.items.all())
+        return obj.client_name, " ".join([obj.client_phone, obj.note, items]), ""
+    if kind == "voucher":
+        return obj.party_name, " ".join([obj.party_phone, obj.description]), obj.category
+    if kind == "contract":
+        clauses = " ".join(
+            f"{link.clause.title} {link.clause.content}" for link in obj.clause_links.all()
+        )
+        parties = " ".join([obj.party_a_name, obj.party_a_title, obj.party_b_name, obj.party_b_title])
+        return obj.subject, f"{parties} {clauses}", ""
+    if kind == "freelance_work":
+        return obj.freelancer.name, obj.description, ""
+    raise ValueError(kind)
+
+
+def _queryset(kind):
+    model = django_apps.get_model("api", KINDS[kind])
+    qs = model.objects.all()
+    if kind == "quotation":
+        return qs.prefetch_related("items")
+    if kind == "contract":
+        return qs.prefetch_related("clause_links__clause")
+    if kind == "freelance_work":
+        return qs.select_related("freelancer")
+    return qs
+
+
+def _write(SearchDocument, cursor, kind, obj):
+    title, body, category = _document(kind, obj)
+    doc, _ = SearchDocument.objects.update_or_create(
+        kind=kind,
+        object_id=obj.pk,
+        defaults={"category": category or "", "title": title[:500]},
+    )
+    # Also clears an orphaned entry left at a reused rowid (e.g. after a table flush).
+    cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [doc.pk])
+    cursor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)",
+        [doc.pk, normalize_arabic(title), normalize_arabic(body)],
+    )
+
+
+def index_object(kind, pk):
+    """(Re)index one object, or drop it from the index if it no longer exists."""
+    if not is_available():
+        return
+    obj = _queryset(kind).filter(pk=pk).first()
+    if obj is None:
+        remove_object(kind, pk)
+        return
+    SearchDocument = django_apps.get_model("api", "SearchDocument")
+    with transaction.atomic(), connection.cursor() as cursor:
+        _write(SearchDocument, cursor, kind, obj)
+
+
+def schedule_index(kind, pk):
+    """Index after the current transaction commits, so nested rows written later are included."""
+    if is_available():
+        transaction.on_commit(partial(index_object, kind, pk))
+
+
+def remove_object(kind, pk):
+    if not is_available():
+        return
+    SearchDocument = django_apps.get_model("api", "SearchDocument")
+    doc_ids = list(SearchDocument.objects.filter(kind=kind, object_id=pk).values_list("pk", flat=True))
+    if not doc_ids:
+        return
+    with transaction.atomic(), connection.cursor() as cursor:
+        for doc_id in doc_ids:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [doc_id])
+        SearchDocument.objects.filter(pk__in=doc_ids).delete()
+
+
+def rebuild_index():
+    """Drop and refill the whole index; returns the number of indexed objects."""
+    if not is_available():
+        return 0
+    SearchDocument = django_apps.get_model("api", "SearchDocument")
+    count = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        SearchDocument.objects.all().delete()
+        for kind in KINDS:
+            for obj in _queryset(kind).iterator(chunk_size=500):
+                _write(SearchDocument, cursor, kind, obj)
+                count += 1
+    return count
+
+
+def _match_expression(query):
+    """Every word must match (as a prefix); quotes are escaped so input is never FTS syntax."""
+    words = normalize_arabic(query).split()
+    return " ".join('"%s"*' % w.replace('"', '""') for w in words)
+
+
+def search(query, kinds=None, exclude_categories=(), limit=20):
+    """
+    Ranked (bm25) matches as dicts: kind, id, title, snippet.
+    kinds restricts the object kinds; exclude_categories hides vouchers of those categories.
+    """
+    expression = _match_expression(query)
+    if not expression:
+        return []
+    sql = [
+        f"SELECT d.kind, d.object_id, d.title, snippet({FTS_TABLE}, 1, '[', ']', '…', 12)",
+        f"FROM {FTS_TABLE} JOIN api_search_document d ON d.id = {FTS_TABLE}.rowid",
+        f"WHERE {FTS_TABLE} MATCH %s",
+    ]
+    params = [expression]
+    if kinds:
+        sql.append("AND d.kind IN (%s)" % ", ".join(["%s"] * len(kinds)))
+        params += list(kinds)
+    if exclude_categories:
+        sql.append("AND d.category NOT IN (%s)" % ", ".join(["%s"] * len(exclude_categories)))
+        params += list(exclude_categories)
+    sql.append(f"ORDER BY bm25({FTS_TABLE}, 10.0, 1.0) LIMIT %s")
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(" ".join(sql), params)
+        rows = cursor.fetchall()
+    return [
+        {"kind": kind, "id": object_id, "title": title, "snippet": snippet}
+        for kind, object_id, title, snippet in rows
+    ]
@@ -2,10 +2,15 @@
 Serializers for Point Digital Marketing Manager API.
 Output format matches frontend types (camelCase handled via to_representation where needed).
 """
+from decimal import Decimal
+
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
 
-from .id_utils import get_next_id
+from . import logos
+from .id_utils import get_next_id, reserve_ids
 from .models import (
     AgencySettings,
     AgencySettingsService,
@@ -23,6 +28,71 @@ from .models import (
 User = get_user_model()
 
 
+def _prefetched(instance, name):
+    """True when relation `name` was loaded by prefetch_related, so .all() costs no query."""
+    return name in getattr(instance, "_prefetched_objects_cache", {})
+
+
+def _split(value):
+    return [part.strip() for part in (value or "").split(",") if part.strip()]
+
+
+class SparseFieldsMixin:
+    """
+    Output only some fields. views.SparseFieldsMixin puts the wanted output names in the
+    context as `fields` (from ?fields= / ?expand=); every other field is dropped before
+    serialization. Meta.list_fields is the slim default for list responses.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        wanted = self.context.get("fields")
+        if wanted is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in wanted}
+
+    @classmethod
+    def requested_fields(cls, query_params, detail=False):
+        """
+        Output names to return, or None for all of them. ?fields= replaces the default
+        (list: Meta.list_fields, detail: everything; "*" means everything), ?expand= adds
+        to it. id is always returned.
+        """
+        all_fields = list(cls.Meta.fields)
+        fields = _split(query_params.get("fields"))
+        expand = _split(query_params.get("expand"))
+        for param, names in (("fields", fields), ("expand", expand)):
+            unknown = [name for name in names if name != "*" and name not in all_fields]
+            if unknown:
+                raise serializers.ValidationError({param: "Unknown field: " + ", ".join(unknown)})
+        if "*" in fields or (detail and not fields):
+            return None
+        wanted = set(fields or getattr(cls.Meta, "list_fields", all_fields)) | set(expand) | {"id"}
+        if wanted.issuperset(all_fields):
+            return None
+        return [name for name in all_fields if name in wanted]
+
+    @classmethod
+    def sparse_columns(cls, names):
+        """(model fields to load with .only(), True if a related collection is read) for the given outputs."""
+        opts = cls.Meta.model._meta
+        columns = [opts.pk.name]
+        relations = False
+        for name, field in cls().fields.items():
+            if name not in names:
+                continue
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                relations = True  # built in to_representation from related rows
+                continue
+            if model_field.concrete:
+                columns.append(model_field.name)
+            else:
+                relations = True
+        return columns, relations
+
+
 # ----- User -----
 class UserSerializer(serializers.ModelSerializer):
     """User serializer; id as string, role as enum string."""
@@ -89,6 +159,11 @@ class ServiceDefinitionSerializer(serializers.Serializer):
     description = serializers.CharField(required=False, allow_blank=True)
 
 
+def _delete_unused_logo(name):
+    if not AgencySettings.objects.filter(logo_file=name).exists():
+        logos.delete(name)
+
+
 class AgencySettingsSerializer(serializers.ModelSerializer):
     services = ServiceDefinitionSerializer(many=True, required=False)
     quotationTerms = serializers.ListField(
@@ -98,6 +173,9 @@ class AgencySettingsSerializer(serializers.ModelSerializer):
     exchangeRate = serializers.DecimalField(
         max_digits=14, decimal_places=2, source="exchange_rate", required=False
     )
+    # Accepts a base64 data URL (stored as files), an external URL, or "" to remove;
+    # returned as the URL of the stored print-size image.
+    logo = serializers.CharField(required=False, allow_blank=True)
 
     class Meta:
         model = AgencySettings
@@ -116,30 +194,67 @@ class AgencySettingsSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         rep = super().to_representation(instance)
+        services = (
+            instance.services_fk.all()
+            if _prefetched(instance, "services_fk")
+            else instance.services_fk.order_by("id")
+        )
         rep["services"] = [
             {"name": s.name, "description": s.description or ""}
-            for s in instance.services_fk.all().order_by("id")
+            for s in services
         ]
         rep["quotationTerms"] = instance.quotation_terms or []
         rep["twilio"] = instance.twilio or {}
         rep["exchangeRate"] = float(instance.exchange_rate) if instance.exchange_rate else 1500
+        if instance.logo_file:
+            variants = logos.urls(instance.logo_file, self.context.get("request"))
+            rep["logo"] = variants["print"].get("png") or variants["original"]
+            rep["logoVariants"] = variants
+        else:
+            rep["logo"] = instance.logo or ""
+            rep["logoVariants"] = None
         return rep
 
+    @staticmethod
+    def _apply_logo(instance, value):
+        """Set logo / logo_file from the submitted value; old files are removed after commit."""
+        old_file = instance.logo_file
+        if logos.is_data_url(value):
+            try:
+                mime, data = logos.decode_data_url(value)
+                instance.logo_file = logos.store(data, mime)
+            except logos.LogoError as e:
+                raise serializers.ValidationError({"logo": str(e)})
+            instance.logo = ""
+        elif logos.is_stored_url(old_file, value):
+            return
+        else:
+            instance.logo = value
+            instance.logo_file = ""
+        if old_file and old_file != instance.logo_file:
+            transaction.on_commit(lambda: _delete_unused_logo(old_file))
+
+    @transaction.atomic
     def create(self, validated_data):
         services_data = validated_data.pop("services", [])
         quotation_terms = validated_data.pop("quotation_terms", [])
         exchange_rate = validated_data.pop("exchange_rate", 1500)
         twilio = validated_data.pop("twilio", {})
-        settings = AgencySettings.objects.create(
+        logo = validated_data.pop("logo", None)
+        settings = AgencySettings(
             quotation_terms=quotation_terms,
             exchange_rate=exchange_rate,
             twilio=twilio,
             **validated_data,
         )
+        if logo is not None:
+            self._apply_logo(settings, logo)
+        settings.save(force_insert=True)
         for s in services_data:
             AgencySettingsService.objects.create(settings=settings, **s)
         return settings
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         services_data = validated_data.pop("services", None)
         quotation_terms = validated_data.get("quotation_terms")
@@ -149,6 +264,8 @@ class AgencySettingsSerializer(serializers.ModelSerializer):
             instance.exchange_rate = validated_data.pop("exchange_rate")
         if "twilio" in validated_data:
             instance.twilio = validated_data.pop("twilio")
+        if "logo" in validated_data:
+            self._apply_logo(instance, validated_data.pop("logo"))
         for attr, value in validated_data.items():
             if attr not in ("quotation_terms", "exchange_rate", "twilio"):
                 setattr(instance, attr, value)
@@ -162,7 +279,8 @@ class AgencySettingsSerializer(serializers.ModelSerializer):
 
 # ----- Quotation -----
 class QuotationItemSerializer(serializers.ModelSerializer):
-    id = serializers.CharField(read_only=True)
+    # Writable so updates can match incoming items to existing rows; ignored on create.
+    id = serializers.CharField(required=False, allow_blank=True)
     currency = serializers.CharField(required=False, allow_blank=True)
 
     class Meta:
@@ -170,7 +288,7 @@ class QuotationItemSerializer(serializers.ModelSerializer):
         fields = ["id", "description", "price", "quantity", "currency"]
 
 
-class QuotationSerializer(serializers.ModelSerializer):
+class QuotationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     id = serializers.CharField(read_only=True)
     clientName = serializers.CharField(source="client_name")
     clientPhone = serializers.CharField(source="client_phone", required=False, allow_blank=True)
@@ -181,30 +299,52 @@ class QuotationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Quotation
         fields = ["id", "clientName", "clientPhone", "date", "items", "total", "currency", "status", "note"]
+        list_fields = ["id", "clientName", "clientPhone", "date", "total", "currency", "status"]
 
     def to_representation(self, instance):
         rep = super().to_representation(instance)
-        rep["items"] = QuotationItemSerializer(instance.items.all().order_by("id"), many=True).data
+        if "items" not in self.fields:
+            return rep
+        items = instance.items.all() if _prefetched(instance, "items") else instance.items.order_by("id")
+        rep["items"] = QuotationItemSerializer(items, many=True).data
         return rep
 
+    ITEM_FIELDS = ["description", "price", "quantity", "currency"]
+
+    @staticmethod
+    def _with_defaults(item):
+        """Copy of validated item data with the model defaults of optional fields filled in."""
+        item = dict(item)
+        item.setdefault("currency", "")
+        item.setdefault("quantity", 1)
+        return item
+
+    @classmethod
+    def _build_items(cls, quotation, items_data):
+        """Unsaved QuotationItem rows (ids reserved in one block) and their Decimal total."""
+        item_ids = reserve_ids("QI", QuotationItem, len(items_data))
+        items = []
+        total = Decimal("0")
+        for item, item_id in zip(items_data, item_ids):
+            item = cls._with_defaults(item)
+            item.pop("id", None)
+            items.append(QuotationItem(id=item_id, quotation=quotation, **item))
+            total += item["price"] * item["quantity"]
+        return items, total
+
+    @transaction.atomic
     def create(self, validated_data):
         items_data = validated_data.pop("items", [])
         validated_data["client_name"] = validated_data.pop("client_name")
         validated_data["client_phone"] = validated_data.pop("client_phone", "") or ""
         validated_data.setdefault("currency", "IQD")
-        validated_data["id"] = get_next_id("QT", Quotation)
-        quotation = Quotation.objects.create(**validated_data)
-        total = 0
-        for item in items_data:
-            item.pop("id", None)
-            item.setdefault("currency", "")
-            item["id"] = get_next_id("QI", QuotationItem)
-            qi = QuotationItem.objects.create(quotation=quotation, **item)
-            total += float(qi.price) * qi.quantity
-        quotation.total = total
-        quotation.save()
+        quotation = Quotation(id=get_next_id("QT", Quotation), **validated_data)
+        items, quotation.total = self._build_items(quotation, items_data)
+        quotation.save(force_insert=True)
+        QuotationItem.objects.bulk_create(items)
         return quotation
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         items_data = validated_data.pop("items", None)
         if "client_name" in validated_data:
@@ -214,21 +354,57 @@ class QuotationSerializer(serializers.ModelSerializer):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         if items_data is not None:
-            instance.items.all().delete()
-            total = 0
-            for item in items_data:
-                item.pop("id", None)
-                item.setdefault("currency", "")
-                item["id"] = get_next_id("QI", QuotationItem)
-                qi = QuotationItem.objects.create(quotation=instance, **item)
-                total += float(qi.price) * qi.quantity
-            instance.total = total
+            instance.total = self._sync_items(instance, items_data)
         instance.save()
         return instance
 
+    def _sync_items(self, instance, items_data):
+        """
+        Reconcile incoming items with existing rows by id: unchanged rows are left alone,
+        changed rows are bulk-updated, unknown ones inserted and missing ones deleted.
+        Items are listed by id, so when the incoming order cannot be kept that way
+        (reordering, or new items before existing ones) all items are rewritten.
+        Returns the Decimal total of the incoming items.
+        """
+        items_data = [self._with_defaults(item) for item in items_data]
+        existing = {item.id: item for item in instance.items.all()}
+        matched = []
+        new_data = []
+        changed = []
+        for item in items_data:
+            item = dict(item)
+            current = existing.pop(item.pop("id", None) or "", None)
+            if current is None:
+                new_data.append(item)
+                continue
+            if new_data:
+                matched = None  # an existing item follows a new one
+                break
+            matched.append(current.id)
+            if any(getattr(current, f) != item[f] for f in self.ITEM_FIELDS):
+                for f in self.ITEM_FIELDS:
+                    setattr(current, f, item[f])
+                changed.append(current)
+
+        total = sum((item["price"] * item["quantity"] for item in items_data), Decimal("0"))
+        if matched is None or matched != sorted(matched):
+            instance.items.all().delete()
+            items, _ = self._build_items(instance, items_data)
+            QuotationItem.objects.bulk_create(items)
+            return total
+
+        if existing:
+            QuotationItem.objects.filter(id__in=list(existing)).delete()
+        if changed:
+            QuotationItem.objects.bulk_update(changed, self.ITEM_FIELDS)
+        if new_data:
+            items, _ = self._build_items(instance, new_data)
+            QuotationItem.objects.bulk_create(items)
+        return total
+
 
 # ----- Voucher -----
-class VoucherSerializer(serializers.ModelSerializer):
+class VoucherSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     id = serializers.CharField(read_only=True)
     type = serializers.ChoiceField(choices=Voucher.VoucherType.choices)
     partyName = serializers.CharField(source="party_name")
@@ -239,7 +415,9 @@ class VoucherSerializer(serializers.ModelSerializer):
     class Meta:
         model = Voucher
         fields = ["id", "type", "amount", "currency", "date", "description", "partyName", "partyPhone", "category"]
+        list_fields = ["id", "type", "amount", "currency", "date", "partyName", "partyPhone", "category"]
 
+    @transaction.atomic
     def create(self, validated_data):
         validated_data["party_name"] = validated_data.pop("party_name")
         validated_data["party_phone"] = validated_data.pop("party_phone", "") or ""
@@ -248,6 +426,7 @@ class VoucherSerializer(serializers.ModelSerializer):
         validated_data["id"] = get_next_id("VC", Voucher)
         return super().create(validated_data)
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         if "party_name" in validated_data:
             instance.party_name = validated_data.pop("party_name")
@@ -258,14 +437,15 @@ class VoucherSerializer(serializers.ModelSerializer):
 
 # ----- Contract -----
 class ContractClauseSerializer(serializers.ModelSerializer):
-    id = serializers.CharField(read_only=True)
+    # Writable so updates can match incoming clauses to existing rows; ignored on create.
+    id = serializers.CharField(required=False, allow_blank=True)
 
     class Meta:
         model = ContractClause
         fields = ["id", "title", "content"]
 
 
-class ContractSerializer(serializers.ModelSerializer):
+class ContractSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     id = serializers.CharField(read_only=True)
     partyAName = serializers.CharField(source="party_a_name")
     partyATitle = serializers.CharField(source="party_a_title", required=False, allow_blank=True)
@@ -293,15 +473,48 @@ class ContractSerializer(serializers.ModelSerializer):
             "clauses",
             "status",
         ]
+        list_fields = [
+            "id",
+            "date",
+            "partyAName",
+            "partyATitle",
+            "partyBName",
+            "partyBTitle",
+            "subject",
+            "totalValue",
+            "currency",
+            "status",
+        ]
 
     def to_representation(self, instance):
         rep = super().to_representation(instance)
-        links = instance.clause_links.all().order_by("order")
-        rep["clauses"] = [
-            ContractClauseSerializer(link.clause).data for link in links
-        ]
+        if "clauses" not in self.fields:
+            return rep
+        links = (
+            instance.clause_links.all()
+            if _prefetched(instance, "clause_links")
+            else instance.clause_links.select_related("clause").order_by("order")
+        )
+        rep["clauses"] = ContractClauseSerializer(
+            [link.clause for link in links], many=True
+        ).data
         return rep
 
+    @staticmethod
+    def _build_clauses(contract, clauses_data):
+        """Unsaved ContractClause rows (ids reserved in one block) and their ordered links."""
+        clause_ids = reserve_ids("CL", ContractClause, len(clauses_data))
+        clauses = []
+        links = []
+        for i, (c, clause_id) in enumerate(zip(clauses_data, clause_ids)):
+            c = dict(c)
+            c.pop("id", None)
+            clause = ContractClause(id=clause_id, **c)
+            clauses.append(clause)
+            links.append(ContractClauseLink(contract=contract, clause=clause, order=i))
+        return clauses, links
+
+    @transaction.atomic
     def create(self, validated_data):
         clauses_data = validated_data.pop("clauses", [])
         validated_data["party_a_name"] = validated_data.pop("party_a_name")
@@ -312,14 +525,12 @@ class ContractSerializer(serializers.ModelSerializer):
         validated_data.setdefault("currency", "IQD")
         validated_data["id"] = get_next_id("CN", Contract)
         contract = Contract.objects.create(**validated_data)
-        for i, c in enumerate(clauses_data):
-            c = dict(c)
-            c.pop("id", None)
-            c["id"] = get_next_id("CL", ContractClause)
-            clause = ContractClause.objects.create(**c)
-            ContractClauseLink.objects.create(contract=contract, clause=clause, order=i)
+        clauses, links = self._build_clauses(contract, clauses_data)
+        ContractClause.objects.bulk_create(clauses)
+        ContractClauseLink.objects.bulk_create(links)
         return contract
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         clauses_data = validated_data.pop("clauses", None)
         for k in ("party_a_name", "party_a_title", "party_b_name", "party_b_title", "total_value", "currency"):
@@ -328,21 +539,53 @@ class ContractSerializer(serializers.ModelSerializer):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         if clauses_data is not None:
-            for link in instance.clause_links.all():
-                link.clause.delete()
-            instance.clause_links.all().delete()
-            for i, c in enumerate(clauses_data):
-                c = dict(c)
-                c.pop("id", None)
-                c["id"] = get_next_id("CL", ContractClause)
-                clause = ContractClause.objects.create(**c)
-                ContractClauseLink.objects.create(contract=instance, clause=clause, order=i)
+            self._sync_clauses(instance, clauses_data)
         instance.save()
         return instance
 
+    def _sync_clauses(self, instance, clauses_data):
+        """
+        Reconcile incoming clauses with the contract's clauses by id. Only edited clauses
+        are updated, unknown ones inserted, missing ones deleted (cascading to their
+        links); position changes are a single bulk update of ContractClauseLink.order.
+        """
+        links = {
+            link.clause_id: link
+            for link in instance.clause_links.select_related("clause")
+        }
+        matched = [links.pop(c.get("id") or "", None) for c in clauses_data]
+        clause_ids = iter(reserve_ids("CL", ContractClause, matched.count(None)))
+        changed_clauses = []
+        moved_links = []
+        new_clauses = []
+        new_links = []
+        for i, (c, link) in enumerate(zip(clauses_data, matched)):
+            if link is None:
+                clause = ContractClause(id=next(clause_ids), title=c["title"], content=c["content"])
+                new_clauses.append(clause)
+                new_links.append(ContractClauseLink(contract=instance, clause=clause, order=i))
+                continue
+            clause = link.clause
+            if (clause.title, clause.content) != (c["title"], c["content"]):
+                clause.title, clause.content = c["title"], c["content"]
+                changed_clauses.append(clause)
+            if link.order != i:
+                link.order = i
+                moved_links.append(link)
+
+        if links:
+            ContractClause.objects.filter(id__in=list(links)).delete()
+        if changed_clauses:
+            ContractClause.objects.bulk_update(changed_clauses, ["title", "content"])
+        if moved_links:
+            ContractClauseLink.objects.bulk_update(moved_links, ["order"])
+        if new_clauses:
+            ContractClause.objects.bulk_create(new_clauses)
+            ContractClauseLink.objects.bulk_create(new_links)
+
 
 # ----- Freelancer -----
-class FreelancerSerializer(serializers.ModelSerializer):
+class FreelancerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     id = serializers.CharField(read_only=True)
     role = serializers.ChoiceField(choices=Freelancer.Role.choices)
 
@@ -355,8 +598,16 @@ class FreelancerSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class FreelancerSettleSerializer(serializers.Serializer):
+    """Body of POST /freelancers/{id}/settle/."""
+
+    workIds = serializers.ListField(child=serializers.CharField(max_length=36), allow_empty=False)
+    date = serializers.CharField(required=False, allow_blank=True, max_length=50)
+    description = serializers.CharField(required=False, allow_blank=True)
+
+
 # ----- Freelance Work -----
-class FreelanceWorkSerializer(serializers.ModelSerializer):
+class FreelanceWorkSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     id = serializers.CharField(read_only=True)
     freelancerId = serializers.PrimaryKeyRelatedField(
         queryset=Freelancer.objects.all(), source="freelancer", write_only=True
@@ -368,6 +619,14 @@ class FreelanceWorkSerializer(serializers.ModelSerializer):
         model = FreelanceWork
         fields = ["id", "freelancerId", "description", "date", "price", "currency", "isPaid", "paymentId"]
 
+    # What to_representation() replaces, for list pages rendered from .values() (api.list_renderer)
+    value_overrides = {
+        "freelancerId": ("freelancer", str),
+        "price": ("price", str),
+        "isPaid": ("is_paid", bool),
+        "paymentId": ("payment_id", lambda value: value or ""),
+    }
+
     def create(self, validated_data):
         validated_data["freelancer"] = validated_data.pop("freelancer")
         validated_data["is_paid"] = validated_data.get("is_paid", False)
@@ -377,21 +636,42 @@ class FreelanceWorkSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         rep = super().to_representation(instance)
-        rep["freelancerId"] = str(instance.freelancer_id)
-        rep["price"] = str(instance.price)
-        rep["isPaid"] = instance.is_paid
-        rep["paymentId"] = instance.payment_id or ""
+        if "freelancerId" in self.fields:
+            rep["freelancerId"] = str(instance.freelancer_id)
+        if "price" in rep:
+            rep["price"] = str(instance.price)
+        if "isPaid" in rep:
+            rep["isPaid"] = instance.is_paid
+        if "paymentId" in rep:
+            rep["paymentId"] = instance.payment_id or ""
         return rep
 
 
 # ----- SMS Log -----
-class SMSLogSerializer(serializers.ModelSerializer):
+class SMSLogSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     id = serializers.CharField(read_only=True)
     timestamp = serializers.DateTimeField(format="%Y-%m-%dT%H:%M:%S", read_only=True)
+    sid = serializers.CharField(read_only=True)
+    deliveryStatus = serializers.CharField(source="delivery_status", read_only=True)
+    deliveryErrorCode = serializers.CharField(source="delivery_error_code", read_only=True)
+    deliveryUpdatedAt = serializers.DateTimeField(
+        source="delivery_updated_at", format="%Y-%m-%dT%H:%M:%S", read_only=True
+    )
 
     class Meta:
         model = SMSLog
-        fields = ["id", "to", "body", "status", "timestamp", "error"]
+        fields = [
+            "id",
+            "to",
+            "body",
+            "status",
+            "timestamp",
+            "error",
+            "sid",
+            "deliveryStatus",
+            "deliveryErrorCode",
+            "deliveryUpdatedAt",
+        ]
 
     def create(self, validated_data):
         validated_data["id"] = get_next_id("SL", SMSLog)
@@ -0,0 +1,27 @@
+"""
+Process-level cache of the AgencySettings row (without the logo).
+
+Each process keeps the row in memory together with the AgencySettings version it
+was loaded at (api.versions, a database counter bumped after every save/delete
+commits), so all gunicorn workers reload on their next call. Reading settings costs
+one primary key lookup of that counter instead of loading the row.
+"""
+from . import versions
+from .models import AgencySettings
+
+_cached = None  # (version, AgencySettings or None)
+
+
+def get_settings():
+    """
+    The agency settings row with `logo` deferred (accessing it queries the database),
+    or None when no settings were saved yet. Treat the instance as read-only.
+    """
+    global _cached
+    version = versions.get_version(AgencySettings)
+    cached = _cached
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    settings_obj = AgencySettings.objects.defer("logo").order_by("id").first()
+    _cached = (version, settings_obj)
+    return settings_obj
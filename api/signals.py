@@ -0,0 +1,123 @@
+"""
+Signal handlers keeping derived data in sync with the business models.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import ledger, search, sync, versions
+from .models import (
+    User,
+    AgencySettings,
+    AgencySettingsService,
+    Quotation,
+    QuotationItem,
+    Voucher,
+    Contract,
+    ContractClause,
+    ContractClauseLink,
+    Freelancer,
+    FreelanceWork,
+    SMSLog,
+)
+
+SEARCH_KINDS = {
+    Quotation: "quotation",
+    Voucher: "voucher",
+    Contract: "contract",
+    FreelanceWork: "freelance_work",
+}
+
+
+# ----- Search index -----
+# Parents are re-indexed after commit, so items/clauses bulk-written in the same
+# transaction are part of the document. Items and clauses only listen to post_save
+# (admin edits); a post_delete listener would turn their bulk deletes into
+# per-row deletes.
+def index_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.schedule_index(SEARCH_KINDS[sender], instance.pk)
+
+
+def unindex_on_delete(sender, instance, **kwargs):
+    search.remove_object(SEARCH_KINDS[sender], instance.pk)
+
+
+for _model in SEARCH_KINDS:
+    post_save.connect(index_on_save, sender=_model, dispatch_uid=f"search_index_{_model.__name__}")
+    post_delete.connect(unindex_on_delete, sender=_model, dispatch_uid=f"search_unindex_{_model.__name__}")
+
+
+@receiver(post_save, sender=QuotationItem)
+def index_item_quotation(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.schedule_index("quotation", instance.quotation_id)
+
+
+@receiver(post_save, sender=ContractClause)
+def index_clause_contracts(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    for contract_id in instance.contract_links.values_list("contract_id", flat=True):
+        search.schedule_index("contract", contract_id)
+
+
+# ----- Daily ledger -----
+@receiver(pre_save, sender=Voucher)
+def remember_ledger_state(sender, instance, raw=False, **kwargs):
+    instance._ledger_before = None
+    if raw or instance._state.adding:
+        return
+    old = Voucher.objects.filter(pk=instance.pk).first()
+    if old is not None:
+        instance._ledger_before = ledger.snapshot(old)
+
+
+@receiver(post_save, sender=Voucher)
+def update_ledger_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = None if created else getattr(instance, "_ledger_before", None)
+    ledger.record_change(before, ledger.snapshot(instance))
+
+
+@receiver(post_delete, sender=Voucher)
+def update_ledger_on_delete(sender, instance, **kwargs):
+    ledger.record_change(ledger.snapshot(instance), None)
+
+
+# ----- Change versions (response cache, ETags, settings cache) -----
+# Writes that bypass signals (QuerySet.update / bulk_*) call versions.bump() themselves;
+# nested rows written with their parent are covered by the parent's save. Child models
+# only get post_save, for the same fast-delete reason as the search handlers above.
+VERSIONED_MODELS = (User, AgencySettings, Quotation, Voucher, Contract, Freelancer, FreelanceWork, SMSLog)
+PARENT_MODELS = {
+    AgencySettingsService: AgencySettings,
+    QuotationItem: Quotation,
+    ContractClause: Contract,
+    ContractClauseLink: Contract,
+}
+
+
+def bump_version(sender, **kwargs):
+    versions.bump(sender)
+
+
+def bump_parent_version(sender, **kwargs):
+    versions.bump(PARENT_MODELS[sender])
+
+
+for _model in VERSIONED_MODELS:
+    post_save.connect(bump_version, sender=_model, dispatch_uid=f"version_save_{_model.__name__}")
+    post_delete.connect(bump_version, sender=_model, dispatch_uid=f"version_delete_{_model.__name__}")
+for _model in PARENT_MODELS:
+    post_save.connect(bump_parent_version, sender=_model, dispatch_uid=f"version_parent_{_model.__name__}")
+
+
+# ----- Sync tombstones -----
+# Cascades (a freelancer's works) are collected row by row, so each gets its own tombstone.
+def record_tombstone(sender, instance, **kwargs):
+    sync.record_deletion(sender, instance.pk)
+
+
+for _model in sync.KINDS:
+    post_delete.connect(record_tombstone, sender=_model, dispatch_uid=f"sync_tombstone_{_model.__name__}")
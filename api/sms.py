@@ -0,0 +1,587 @@
+"""
+SMS delivery through an outbox: requests only enqueue (SMSOutbox rows); the
+send_sms_outbox worker claims due rows, sends them through the configured backend
+from a small thread pool capped at SMS_MAX_PER_SECOND, retries with exponential
+backoff, and records the outcome in SMSLog. Twilio status callbacks then update the
+log's delivery state in batches (DeliveryStatusBuffer).
+
+The backend is pluggable via settings.SMS_BACKEND (dotted path); TwilioBackend is the
+default and FakeSMSBackend keeps messages in memory for tests and local runs.
+"""
+import atexit
+import logging
+import re
+import string
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import settings_cache, versions
+from .id_utils import reserve_ids
+from .models import Freelancer, Quotation, SMSLog, SMSOutbox
+from .reports import format_money
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = "api.sms.TwilioBackend"
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_RETRY_BASE_SECONDS = 30
+MAX_RETRY_DELAY_SECONDS = 3600
+DEFAULT_SEND_CONCURRENCY = 4
+DEFAULT_MAX_PER_SECOND = 5
+LEASE_SECONDS = 300
+HTTP_TIMEOUT_SECONDS = 15
+
+
+class SMSConfigError(Exception):
+    """Twilio settings are missing or incomplete (message is shown to the user)."""
+
+
+class SMSDeliveryError(Exception):
+    """Sending failed but may succeed later (network, 5xx, rate limit)."""
+
+
+class SMSPermanentError(SMSDeliveryError):
+    """Sending failed and retrying will not help (bad number, bad credentials)."""
+
+
+class TwilioConfig(NamedTuple):
+    account_sid: str
+    auth_token: str
+    from_value: str  # sender number, or alphanumeric sender id
+
+
+def get_twilio_config(settings_obj=None):
+    """Validated Twilio settings from AgencySettings.twilio; raises SMSConfigError."""
+    if settings_obj is None:
+        settings_obj = settings_cache.get_settings()
+    if not settings_obj or not settings_obj.twilio:
+        raise SMSConfigError(
+            "إعدادات Twilio غير متوفرة. احفظ الإعدادات من صفحة الإعدادات (مدير النظام) مع تفعيل ربط Twilio."
+        )
+    twilio_config = settings_obj.twilio or {}
+    # دعم camelCase و snake_case
+    is_enabled = twilio_config.get("isEnabled", twilio_config.get("is_enabled", False))
+    if not is_enabled:
+        raise SMSConfigError("إرسال الرسائل معطل في الإعدادات. فعّل «الربط مفعل» في الإعدادات.")
+    account_sid = (twilio_config.get("accountSid") or twilio_config.get("account_sid") or "").strip()
+    auth_token = (twilio_config.get("authToken") or twilio_config.get("auth_token") or "").strip()
+    from_number = (twilio_config.get("fromNumber") or twilio_config.get("from_number") or "").strip()
+    sender_name = (twilio_config.get("senderName") or twilio_config.get("sender_name") or "").strip()
+    # يمكن استخدام رقم المرسل أو Sender ID (اسم المرسل) فقط
+    from_value = from_number if from_number else sender_name
+    if not account_sid or not auth_token:
+        missing = []
+        if not account_sid:
+            missing.append("Account SID")
+        if not auth_token:
+            missing.append("Auth Token")
+        raise SMSConfigError(
+            "بيانات Twilio ناقصة: " + "، ".join(missing) + ". ادخلها من الإعدادات > ربط إشعارات SMS (Twilio) واحفظ الصفحة."
+        )
+    if not from_value:
+        raise SMSConfigError(
+            "يجب إدخال رقم المرسل أو اسم المرسل (Sender ID) في الإعدادات. يمكنك ترك رقم المرسل فارغاً واستخدام اسم المرسل فقط."
+        )
+    return TwilioConfig(account_sid, auth_token, from_value)
+
+
+def normalize_number(to):
+    """Local Iraqi numbers (07...) to +964...; anything else gets a leading +."""
+    to = (to or "").strip()
+    if to.startswith("07") and len(to) >= 10:
+        return "+964" + to[1:]
+    if not to.startswith("+"):
+        return "+" + to
+    return to
+
+
+def friendly_error(err_msg):
+    """Short Arabic explanation for the common Twilio errors; otherwise the cleaned message."""
+    err_msg = re.sub(r"\x1b\[[0-9;]*m", "", err_msg).strip()
+    if "inactive" in err_msg.lower() or "90010" in err_msg:
+        return "حساب Twilio غير نشط. فعّل الحساب من لوحة Twilio (Console) أو استخدم حساباً آخر. تفاصيل: https://www.twilio.com/docs/errors/90010"
+    if "authenticate" in err_msg.lower() or "20003" in err_msg:
+        return "بيانات Twilio غير صحيحة (Account SID أو Auth Token). تحقق من الإعدادات."
+    if "21606" in err_msg or ("not a valid message-capable" in err_msg and "From" in err_msg):
+        return "اسم المرسل (Sender ID) غير مدعوم لهذا البلد. استخدم «رقم المرسل» في الإعدادات بدلاً من الاعتماد على الاسم فقط، أو راجع: https://www.twilio.com/docs/errors/21606"
+    if "21211" in err_msg or "invalid" in err_msg.lower() and "to" in err_msg.lower():
+        return "رقم المستلم غير صالح. استخدم صيغة دولية مثل +9647xxxxxxxx"
+    return err_msg
+
+
+# ----- Twilio client cache -----
+# One Client per process for the current (accountSid, authToken), sharing a pooled
+# keep-alive requests session, so consecutive messages reuse the TLS connection.
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(config):
+    key = (config.account_sid, config.auth_token)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            from twilio.http.http_client import TwilioHttpClient
+            from twilio.rest import Client
+
+            _close_clients()  # credentials changed: the old account's session is not needed
+            http_client = TwilioHttpClient(pool_connections=True, timeout=HTTP_TIMEOUT_SECONDS)
+            client = _clients[key] = Client(config.account_sid, config.auth_token, http_client=http_client)
+    return client
+
+
+def _close_clients():
+    for client in _clients.values():
+        session = getattr(client.http_client, "session", None)
+        if session is not None:
+            session.close()
+    _clients.clear()
+
+
+def clear_client_cache():
+    """Drop and close this process's cached clients."""
+    with _clients_lock:
+        _close_clients()
+
+
+# ----- Backends -----
+class TwilioBackend:
+    """Sends through the Twilio REST API with the cached, connection-pooled client."""
+
+    def send(self, to, body, config):
+        from twilio.base.exceptions import TwilioRestException
+
+        try:
+            params = {"body": body, "from_": config.from_value, "to": to}
+            callback_url = getattr(settings, "SMS_STATUS_CALLBACK_URL", "")
+            if callback_url:
+                params["status_callback"] = callback_url
+            message = get_client(config).messages.create(**params)
+        except TwilioRestException as e:
+            if 400 <= (e.status or 0) < 500 and e.status != 429:
+                raise SMSPermanentError(friendly_error(str(e))) from e
+            raise SMSDeliveryError(friendly_error(str(e))) from e
+        except Exception as e:
+            raise SMSDeliveryError(friendly_error(str(e))) from e
+        if not message.sid:
+            raise SMSDeliveryError("لم يتم إرجاع معرف الرسالة من Twilio.")
+        return message.sid
+
+
+class FakeSMSBackend:
+    """
+    In-memory backend for tests and local runs: records (to, body) in `sent`.
+    Exceptions appended to `failures` are raised (one per send) before anything is recorded.
+    """
+
+    sent = []
+    failures = []
+
+    def send(self, to, body, config):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append((to, body))
+        return f"SMfake{uuid.uuid4().hex[:26]}"
+
+    @classmethod
+    def reset(cls):
+        cls.sent.clear()
+        cls.failures.clear()
+
+
+def get_backend():
+    return import_string(getattr(settings, "SMS_BACKEND", DEFAULT_BACKEND))()
+
+
+# ----- Outbox -----
+def enqueue(to, body):
+    return SMSOutbox.objects.create(to=to, body=body)
+
+
+def retry_delay(attempts):
+    """Exponential backoff after the given number of failed attempts, capped at an hour."""
+    base = getattr(settings, "SMS_RETRY_BASE_SECONDS", DEFAULT_RETRY_BASE_SECONDS)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), MAX_RETRY_DELAY_SECONDS))
+
+
+def claim_batch(limit=20, lease_seconds=LEASE_SECONDS):
+    """
+    Lease up to `limit` due messages to this worker and return them. Messages whose
+    lease expired (worker died mid-send) are due again. Each claim counts as an attempt.
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    due = Q(status=SMSOutbox.OutboxStatus.PENDING, next_attempt_at__lte=now) | Q(
+        status=SMSOutbox.OutboxStatus.SENDING, locked_until__lt=now
+    )
+    due_ids = SMSOutbox.objects.filter(due).order_by("next_attempt_at", "id").values("pk")[:limit]
+    SMSOutbox.objects.filter(due, pk__in=due_ids).update(
+        status=SMSOutbox.OutboxStatus.SENDING,
+        claim_token=token,
+        locked_until=now + timedelta(seconds=lease_seconds),
+        attempts=F("attempts") + 1,
+    )
+    return list(SMSOutbox.objects.filter(claim_token=token, status=SMSOutbox.OutboxStatus.SENDING))
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads; rate <= 0 means no limit."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate and rate > 0 else 0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _send(message, backend, config, limiter):
+    """Runs in a pool thread: no database access here, only the backend call."""
+    limiter.wait()
+    try:
+        return message, backend.send(message.to, message.body, config), None
+    except SMSDeliveryError as e:
+        return message, None, e
+
+
+def record_results(results):
+    """
+    Store (message, sid, error) outcomes: outbox rows are updated (only while still held
+    by this claim), transient failures are rescheduled with backoff until SMS_MAX_ATTEMPTS,
+    and final outcomes are bulk-inserted into SMSLog. Returns {status: count}.
+    """
+    max_attempts = getattr(settings, "SMS_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)
+    now = timezone.now()
+    logs = []
+    counts = Counter()
+    with transaction.atomic():
+        for message, sid, error in results:
+            mine = SMSOutbox.objects.filter(pk=message.pk, claim_token=message.claim_token)
+            if error is None:
+                outcome = SMSOutbox.OutboxStatus.SENT
+                mine.update(status=outcome, sid=sid, last_error="", locked_until=None, sent_at=now)
+                logs.append(
+                    SMSLog(to=message.to, body=message.body, status=SMSLog.LogStatus.SUCCESS, sid=sid)
+                )
+            elif isinstance(error, SMSPermanentError) or message.attempts >= max_attempts:
+                outcome = SMSOutbox.OutboxStatus.FAILED
+                mine.update(status=outcome, last_error=str(error), locked_until=None)
+                logs.append(
+                    SMSLog(to=message.to, body=message.body, status=SMSLog.LogStatus.FAILED, error=str(error))
+                )
+            else:
+                outcome = SMSOutbox.OutboxStatus.PENDING
+                mine.update(
+                    status=outcome,
+                    last_error=str(error),
+                    locked_until=None,
+                    next_attempt_at=now + retry_delay(message.attempts),
+                )
+            counts[outcome] += 1
+        for log, log_id in zip(logs, reserve_ids("SL", SMSLog, len(logs))):
+            log.id = log_id
+        SMSLog.objects.bulk_create(logs)
+        if logs:
+            versions.bump(SMSLog)
+    return counts
+
+
+def process_batch(limit=20, backend=None, concurrency=None, limiter=None):
+    """
+    Claim one batch and send it through a pool of `concurrency` threads, paced by
+    `limiter` (pass the same RateLimiter across batches to hold the rate).
+    Returns the number of messages handled.
+    """
+    if concurrency is None:
+        concurrency = getattr(settings, "SMS_SEND_CONCURRENCY", DEFAULT_SEND_CONCURRENCY)
+    if limiter is None:
+        limiter = RateLimiter(getattr(settings, "SMS_MAX_PER_SECOND", DEFAULT_MAX_PER_SECOND))
+    # the lease has to outlast a rate-limited batch
+    messages = claim_batch(limit, LEASE_SECONDS + int(limit * limiter.interval))
+    if not messages:
+        return 0
+    backend = backend or get_backend()
+    try:
+        config = get_twilio_config()
+    except SMSConfigError as e:
+        results = [(message, None, e) for message in messages]
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            results = list(pool.map(lambda m: _send(m, backend, config, limiter), messages))
+    record_results(results)
+    return len(messages)
+
+
+# ----- Bulk -----
+PHONE_PATTERN = re.compile(r"^\+\d{8,15}$")
+SELECTORS = ("pending_quotations", "unpaid_freelancers")
+
+
+def _template_parts(template):
+    """
+    (literal text, placeholder name or None) pairs. Only plain {name} placeholders are
+    accepted: no positional fields, attribute/index lookups, conversions or format
+    specs. Raises ValueError for anything else or for unbalanced braces.
+    """
+    parts = []
+    for literal, field, format_spec, conversion in string.Formatter().parse(template):
+        if field is not None and (not field.isidentifier() or format_spec or conversion):
+            raise ValueError(f"Unsupported placeholder: {{{field}}}")
+        parts.append((literal, field))
+    return parts
+
+
+def validate_template(template):
+    _template_parts(template)
+
+
+def render(template, context):
+    """Fill {name} placeholders; unknown names are left as written. Raises ValueError for an invalid template."""
+    out = []
+    for literal, field in _template_parts(template):
+        out.append(literal)
+        if field is not None:
+            out.append(str(context[field]) if field in context else "{%s}" % field)
+    return "".join(out)
+
+
+def selector_recipients(selector):
+    """
+    Recipients (dicts with "to" and template fields) for a named selector:
+    - pending_quotations: clients of PENDING quotations; {name}, {quotationId}, {total}, {currency}
+    - unpaid_freelancers: freelancers with unpaid works; {name}, {unpaid} (e.g. "150000.00 IQD")
+    """
+    if selector == "pending_quotations":
+        rows = (
+            Quotation.objects.filter(status=Quotation.Status.PENDING)
+            .exclude(client_phone="")
+            .values_list("client_phone", "client_name", "id", "total", "currency")
+            .order_by("created_at", "id")
+        )
+        return [
+            {"to": phone, "name": name, "quotationId": pk, "total": format_money(total), "currency": currency}
+            for phone, name, pk, total, currency in rows
+        ]
+    if selector == "unpaid_freelancers":
+        rows = (
+            Freelancer.objects.exclude(phone="")
+            .filter(works__is_paid=False)
+            .values_list("id", "name", "phone", "works__currency")
+            .annotate(unpaid=Sum("works__price"))
+            .order_by("name", "id", "works__currency")
+        )
+        recipients = {}
+        for pk, name, phone, currency, unpaid in rows:
+            recipient = recipients.setdefault(pk, {"to": phone, "name": name, "unpaid": []})
+            recipient["unpaid"].append(f"{format_money(unpaid)} {currency}")
+        for recipient in recipients.values():
+            recipient["unpaid"] = "، ".join(recipient["unpaid"])
+        return list(recipients.values())
+    raise ValueError(selector)
+
+
+def enqueue_bulk(recipients, template):
+    """
+    Queue one message per distinct normalized number (first occurrence wins) with one
+    bulk insert. Returns a summary row per recipient: to, normalized, status
+    (queued / duplicate / invalid) and outboxId for queued ones.
+    """
+    summary = []
+    rows = []
+    seen = set()
+    for recipient in recipients:
+        to = str(recipient.get("to") or "").strip()
+        normalized = normalize_number(to) if to else ""
+        entry = {"to": to, "normalized": normalized}
+        if not PHONE_PATTERN.match(normalized):
+            entry["status"] = "invalid"
+        elif normalized in seen:
+            entry["status"] = "duplicate"
+        else:
+            seen.add(normalized)
+            entry["status"] = "queued"
+            rows.append((entry, SMSOutbox(to=normalized, body=render(template, recipient))))
+        summary.append(entry)
+    created = SMSOutbox.objects.bulk_create([message for _, message in rows])
+    for (entry, _), message in zip(rows, created):
+        entry["outboxId"] = message.pk
+    return summary
+
+
+# ----- Delivery status callbacks -----
+# Rank of each Twilio message status; a callback never moves a log back to a lower rank
+# (callbacks can arrive out of order, e.g. "sent" after "delivered").
+DELIVERY_STATUS_RANK = {
+    "accepted": 0,
+    "scheduled": 0,
+    "queued": 1,
+    "sending": 2,
+    "sent": 3,
+    "delivered": 4,
+    "undelivered": 4,
+    "failed": 4,
+    "canceled": 4,
+    "read": 5,
+}
+DEFAULT_STATUS_FLUSH_SECONDS = 1.0
+# A callback can arrive before the worker has written the SMSLog row with its sid;
+# such statuses are retried on every flush for this long.
+UNMATCHED_STATUS_TTL_SECONDS = 300
+STATUS_BATCH_SIZE = 100
+
+
+def validate_callback_signature(url, params, signature, auth_token):
+    from twilio.request_validator import RequestValidator
+
+    return bool(signature) and RequestValidator(auth_token).validate(url, params, signature)
+
+
+def apply_delivery_statuses(updates):
+    """
+    Write {sid: (status, error_code, at)} to the matching SMSLog rows, one UPDATE per
+    distinct (status, error_code) in one transaction; callers pass at most
+    STATUS_BATCH_SIZE sids. delivery_updated_at is the newest callback time of the group.
+    Returns the set of sids that have no SMSLog row (yet).
+    """
+    if not updates:
+        return set()
+    groups = {}
+    for sid, (delivery_status, error_code, at) in updates.items():
+        groups.setdefault((delivery_status, error_code), []).append((sid, at))
+    now = timezone.now()
+    updated = 0
+    with transaction.atomic():
+        known = set(SMSLog.objects.filter(sid__in=list(updates)).values_list("sid", flat=True))
+        for (delivery_status, error_code), entries in groups.items():
+            rank = DELIVERY_STATUS_RANK.get(delivery_status, 0)
+            higher = [name for name, other in DELIVERY_STATUS_RANK.items() if other > rank]
+            logs = SMSLog.objects.filter(sid__in=[sid for sid, _ in entries])
+            if higher:
+                logs = logs.exclude(delivery_status__in=higher)
+            updated += logs.update(
+                delivery_status=delivery_status,
+                delivery_error_code=error_code,
+                delivery_updated_at=max((at for _, at in entries if at is not None), default=None),
+                updated_at=now,
+            )
+    if updated:
+        versions.bump(SMSLog)
+    return set(updates) - known
+
+
+def _keep_highest(statuses, sid, entry):
+    """Store entry (status, error_code, at) for sid unless a higher-ranked status is already there."""
+    current = statuses.get(sid)
+    if current is None or DELIVERY_STATUS_RANK.get(entry[0], 0) >= DELIVERY_STATUS_RANK.get(current[0], 0):
+        statuses[sid] = entry
+
+
+class DeliveryStatusBuffer:
+    """
+    Collects status callbacks in memory and applies them from a background thread,
+    a few UPDATEs per batch instead of one write transaction per callback. Per sid only
+    the highest-ranked status is kept. Statuses for sids without an SMSLog row yet
+    (the worker records a batch after sending all of it) are kept and retried for
+    UNMATCHED_STATUS_TTL_SECONDS. Pending updates are flushed at process exit;
+    a hard crash loses at most SMS_STATUS_FLUSH_SECONDS of callbacks.
+    """
+
+    def __init__(self, flush_seconds=None, unmatched_ttl=UNMATCHED_STATUS_TTL_SECONDS):
+        self.flush_seconds = flush_seconds
+        self.unmatched_ttl = unmatched_ttl
+        self._pending = {}
+        self._unmatched = {}  # sid -> ((status, error_code, at), first seen, monotonic)
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def add(self, sid, delivery_status, error_code=""):
+        with self._cond:
+            _keep_highest(self._pending, sid, (delivery_status, error_code, timezone.now()))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sms-status-flush", daemon=True)
+                self._thread.start()
+            if len(self._pending) >= STATUS_BATCH_SIZE:
+                self._cond.notify()
+
+    def _take(self):
+        with self._cond:
+            added, self._pending = self._pending, {}
+            unmatched, self._unmatched = self._unmatched, {}
+        pending = {sid: entry for sid, (entry, _) in unmatched.items()}
+        for sid, entry in added.items():
+            _keep_highest(pending, sid, entry)
+        return pending, unmatched
+
+    def flush(self):
+        """
+        Apply what is pending in chunks of STATUS_BATCH_SIZE; returns the number of
+        statuses written. A chunk that fails is kept for the next flush and its error
+        raised once the other chunks are done.
+        """
+        pending, unmatched = self._take()
+        sids = list(pending)
+        missing = set()
+        written = 0
+        error = None
+        for start in range(0, len(sids), STATUS_BATCH_SIZE):
+            chunk = {sid: pending[sid] for sid in sids[start : start + STATUS_BATCH_SIZE]}
+            try:
+                chunk_missing = apply_delivery_statuses(chunk)
+            except Exception as exc:
+                with self._cond:
+                    for sid, entry in chunk.items():  # keep them for the next flush
+                        _keep_highest(self._pending, sid, entry)
+                error = error or exc
+                continue
+            missing |= chunk_missing
+            written += len(chunk) - len(chunk_missing)
+        now = time.monotonic()
+        with self._cond:
+            for sid in missing:
+                first_seen = unmatched[sid][1] if sid in unmatched else now
+                if now - first_seen < self.unmatched_ttl:
+                    self._unmatched[sid] = (pending[sid], first_seen)
+                else:
+                    logger.warning("Dropping SMS delivery status for unknown sid %s", sid)
+        if error is not None:
+            raise error
+        return written
+
+    def _run(self):
+        from django.db import close_old_connections
+
+        while True:
+            delay = self.flush_seconds
+            if delay is None:
+                delay = getattr(settings, "SMS_STATUS_FLUSH_SECONDS", DEFAULT_STATUS_FLUSH_SECONDS)
+            with self._cond:
+                self._cond.wait(timeout=delay)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Applying SMS delivery statuses failed")
+            finally:
+                close_old_connections()
+
+
+delivery_statuses = DeliveryStatusBuffer()
+atexit.register(delivery_statuses.flush)
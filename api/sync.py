@@ -0,0 +1,175 @@
+"""
+Delta sync: the rows created, changed or deleted since a cursor, so the frontend can
+keep its collections up to date without reloading them.
+
+Every synced model has `updated_at` (auto_now, and set explicitly by QuerySet.update()
+callers); deletes leave a Tombstone. The cursor holds one (updated_at, id) position per
+collection plus one for the tombstones, and each page walks forward from there in that
+order. updated_at is taken when a row is saved, not when its transaction commits, so a
+caught-up position is held OVERLAP_SECONDS behind the clock: rows written just before a
+sync are sent again on the next one instead of being skipped when a slower transaction
+commits late. Clients upsert changes by id, then drop the deleted ids.
+
+Tombstones are kept for SYNC_TOMBSTONE_DAYS (older ones are pruned on the next
+delete). A cursor issued before that window may have missed deletes, so it is answered
+with a full load flagged "reset": true, and the client replaces its local data.
+"""
+import base64
+import json
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+
+from .models import Contract, Freelancer, FreelanceWork, Quotation, SMSLog, Tombstone, Voucher
+from .pagination import KeysetPagination
+
+# model -> collection name in sync responses and Tombstone.kind
+KINDS = {
+    Quotation: "quotations",
+    Voucher: "vouchers",
+    Contract: "contracts",
+    Freelancer: "freelancers",
+    FreelanceWork: "freelanceWorks",
+    SMSLog: "smsLogs",
+}
+DELETED_KEY = "deleted"
+ORDERING = (("updated_at", False), ("id", False))
+TOMBSTONE_ORDERING = (("deleted_at", False), ("id", False))
+OVERLAP_SECONDS = 5
+DEFAULT_TOMBSTONE_DAYS = 30
+DEFAULT_LIMIT = 200
+MAX_LIMIT = 1000
+
+
+class Collection(NamedTuple):
+    name: str
+    queryset: object
+    serializer_class: type
+    hidden: object = None  # row -> True if the user may not see it; reported as deleted
+
+
+def tombstone_retention():
+    return timedelta(days=getattr(settings, "SYNC_TOMBSTONE_DAYS", DEFAULT_TOMBSTONE_DAYS))
+
+
+def record_deletion(model, object_id):
+    now = timezone.now()
+    Tombstone.objects.filter(deleted_at__lt=now - tombstone_retention()).delete()
+    Tombstone.objects.create(kind=KINDS[model], object_id=str(object_id))
+
+
+def _invalid_cursor():
+    return ValidationError({"since": "Invalid cursor."})
+
+
+def encode_cursor(issued_at, positions):
+    raw = json.dumps(
+        {
+            "at": issued_at.isoformat(),
+            "positions": {
+                name: [value.isoformat() if hasattr(value, "isoformat") else value, pk]
+                for name, (value, pk) in positions.items()
+                if value is not None
+            },
+        }
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(token):
+    """(issued at, {name: [updated_at, id]}); an empty token starts from the beginning."""
+    if not token:
+        return None, {}
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+    except (ValueError, UnicodeError):
+        raise _invalid_cursor()
+    if not isinstance(cursor, dict) or not isinstance(cursor.get("at"), str):
+        raise _invalid_cursor()
+    issued_at = parse_datetime(cursor["at"])
+    positions = cursor.get("positions")
+    if (
+        issued_at is None
+        or timezone.is_naive(issued_at)
+        or not isinstance(positions, dict)
+        or not all(isinstance(v, list) for v in positions.values())
+    ):
+        raise _invalid_cursor()
+    return issued_at, positions
+
+
+def _page(queryset, ordering, position, limit):
+    """(rows after position, has more) in the given ascending ordering."""
+    queryset = queryset.order_by(*(name for name, _ in ordering))
+    if position is not None:
+        try:
+            queryset = queryset.filter(KeysetPagination._after(queryset.model, ordering, position))
+        except NotFound:
+            raise _invalid_cursor()
+    rows = list(queryset[: limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def _next_position(rows, ordering, position, has_more, horizon):
+    """Position after rows; once caught up it is held back to the overlap horizon."""
+    time_field, pk_field = (name for name, _ in ordering)
+    if not rows:
+        return tuple(position) if position is not None else (None, None)
+    last = rows[-1]
+    value, pk = getattr(last, time_field), getattr(last, pk_field)
+    if not has_more and value > horizon:
+        # "" / 0 sort before every id, so rows stamped exactly at the horizon are resent too
+        return horizon, "" if isinstance(pk, str) else 0
+    return value, pk
+
+
+def changes(collections, token, limit=DEFAULT_LIMIT, context=None):
+    """
+    {"cursor", "hasMore", "reset", "changes": {name: [...]}, "deleted": {name: [id, ...]}}
+    with up to `limit` changed rows per collection and `limit` deletions. Keep calling
+    with the returned cursor while hasMore is true. reset is true when the cursor is
+    older than the tombstones: the response starts a full load instead.
+    """
+    issued_at, positions = decode_cursor(token)
+    now = timezone.now()
+    horizon = now - timedelta(seconds=OVERLAP_SECONDS)
+    reset = issued_at is not None and issued_at < horizon - tombstone_retention()
+    if reset:
+        positions = {}
+    next_positions = {}
+    has_more = False
+    changed = {}
+    deleted = {c.name: [] for c in collections}
+
+    for collection in collections:
+        rows, more = _page(collection.queryset, ORDERING, positions.get(collection.name), limit)
+        has_more = has_more or more
+        next_positions[collection.name] = _next_position(
+            rows, ORDERING, positions.get(collection.name), more, horizon
+        )
+        if collection.hidden is not None:
+            deleted[collection.name].extend(r.pk for r in rows if collection.hidden(r))
+            rows = [r for r in rows if not collection.hidden(r)]
+        changed[collection.name] = collection.serializer_class(rows, many=True, context=context).data
+
+    tombstones, more = _page(
+        Tombstone.objects.filter(kind__in=list(deleted)), TOMBSTONE_ORDERING, positions.get(DELETED_KEY), limit
+    )
+    has_more = has_more or more
+    next_positions[DELETED_KEY] = _next_position(
+        tombstones, TOMBSTONE_ORDERING, positions.get(DELETED_KEY), more, horizon
+    )
+    for tombstone in tombstones:
+        deleted[tombstone.kind].append(tombstone.object_id)
+
+    return {
+        "cursor": encode_cursor(now, next_positions),
+        "hasMore": has_more,
+        "reset": reset,
+        "changes": changed,
+        "deleted": deleted,
+    }
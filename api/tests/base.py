@@ -0,0 +1,27 @@
+"""
+Shared setup for the API tests: an in-memory cache (cached responses),
+a known API key and the fake SMS backend.
+"""
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api import sms
+
+API_KEY = "test-key"
+
+
+@override_settings(
+    ALLOWED_API_KEYS=API_KEY,
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    SMS_BACKEND="api.sms.FakeSMSBackend",
+)
+class APITestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        sms.FakeSMSBackend.reset()
+
+    def client_for(self, user):
+        client = APIClient(HTTP_X_API_KEY=API_KEY)
+        client.force_authenticate(user)
+        return client
@@ -0,0 +1,32 @@
+import csv
+import io
+from decimal import Decimal
+
+from api.models import User, Voucher
+
+from .base import APITestCase
+
+
+class CsvExportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(User.objects.create_user("admin", password="x", role="ADMIN"))
+
+    def export_rows(self):
+        response = self.client.get("/api/vouchers/export/?file_format=csv")
+        self.assertEqual(response.status_code, 200)
+        text = b"".join(response.streaming_content).decode("utf-8-sig")
+        return list(csv.DictReader(io.StringIO(text)))
+
+    def test_formula_like_text_is_escaped(self):
+        descriptions = ["=cmd|' /C calc'!A0", "+1", "-2", "@SUM(A1)", "\tx", "\rx", "plain = text"]
+        for i, description in enumerate(descriptions):
+            Voucher.objects.create(
+                id=f"VC-{i}", type="PAYMENT", amount=Decimal("-5"), date="2024-01-01", party_name="p",
+                description=description,
+            )
+        rows = {row["id"]: row for row in self.export_rows()}
+        for i, description in enumerate(descriptions):
+            expected = description if i == len(descriptions) - 1 else "'" + description
+            self.assertEqual(rows[f"VC-{i}"]["description"], expected)
+            self.assertEqual(rows[f"VC-{i}"]["amount"], "-5.00")  # numbers are not escaped
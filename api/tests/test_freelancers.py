@@ -0,0 +1,36 @@
+from decimal import Decimal
+
+from api.models import Freelancer, FreelanceWork, User, Voucher
+
+from .base import APITestCase
+
+
+class SettleTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(User.objects.create_user("admin", password="x", role="ADMIN"))
+        freelancer = Freelancer.objects.create(id="FL-1", name="Ali", phone="07700000001")
+        for i in range(2):
+            FreelanceWork.objects.create(
+                id=f"WK-{i}", freelancer=freelancer, description="w", date="2024-01-01", price=Decimal("10.5")
+            )
+
+    def settle(self, body):
+        return self.client.post("/api/freelancers/FL-1/settle/", body, format="json")
+
+    def test_settles_works_with_one_voucher(self):
+        response = self.settle({"workIds": ["WK-0", "WK-1", "WK-0"], "date": " 2024-02-01 "})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["updated"], 2)
+        voucher = Voucher.objects.get()
+        self.assertEqual((voucher.amount, voucher.date, voucher.category), (Decimal("21.00"), "2024-02-01", "FREELANCE"))
+        self.assertEqual(set(FreelanceWork.objects.values_list("payment_id", flat=True)), {voucher.id})
+
+    def test_rejects_malformed_bodies(self):
+        for body in [{}, {"workIds": []}, {"workIds": 5}, {"workIds": "abc"}, {"workIds": [["WK-0"]]},
+                     {"workIds": ["WK-0"], "date": ["2024"]}, {"workIds": ["WK-0"], "description": {}}]:
+            with self.subTest(body=body):
+                response = self.settle(body)
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(Voucher.objects.exists())
+        self.assertFalse(FreelanceWork.objects.filter(is_paid=True).exists())
@@ -0,0 +1,127 @@
+from decimal import Decimal
+from unittest import mock
+from urllib.parse import quote
+
+from django.test import override_settings
+from django.utils import timezone
+
+from api import list_renderer
+from api.models import (
+    Contract,
+    ContractClause,
+    ContractClauseLink,
+    Freelancer,
+    FreelanceWork,
+    Quotation,
+    QuotationItem,
+    SMSLog,
+    User,
+    Voucher,
+)
+
+from .base import APITestCase
+
+URLS = [
+    "/api/vouchers/",
+    "/api/vouchers/?cursor=",
+    "/api/vouchers/?fields=*",
+    "/api/vouchers/?fields=amount,category&cursor=",
+    "/api/vouchers/?category=FREELANCE,OWNER_WITHDRAWAL",
+    "/api/vouchers/?type=PAYMENT&currency=USD&cursor=",
+    "/api/vouchers/?date_from=2024-01-02&party=" + quote("طرف"),
+    "/api/quotations/",
+    "/api/quotations/?fields=note,total",
+    "/api/quotations/?expand=items",
+    "/api/quotations/?status=ACCEPTED,REJECTED&client=07",
+    "/api/contracts/",
+    "/api/contracts/?expand=clauses",
+    "/api/contracts/?status=ACTIVE&fields=subject,totalValue",
+    "/api/freelancers/",
+    "/api/freelance-works/",
+    "/api/freelance-works/?cursor=",
+    "/api/freelance-works/?fields=isPaid,price",
+    "/api/freelance-works/?fields=description&cursor=",
+    "/api/sms-logs/",
+    "/api/sms-logs/?cursor=",
+    "/api/sms-logs/?fields=*&cursor=",
+]
+
+
+@override_settings(RESPONSE_CACHE_SECONDS=0)
+class ListRendererEquivalenceTests(APITestCase):
+    """Lists built by api.list_renderer are byte for byte what the serializers produce."""
+
+    def setUp(self):
+        super().setUp()
+        self.users = [
+            User.objects.create_user("admin", password="x", role="ADMIN"),
+            User.objects.create_user("accountant", password="x", role="ACCOUNTANT"),
+        ]
+        categories = ["", "OWNER_WITHDRAWAL", "FREELANCE", "SALARY", "OWNER_WITHDRAWAL"]
+        for i, category in enumerate(categories):
+            Voucher.objects.create(
+                id=f"VC-{i}",
+                type="PAYMENT" if i % 2 else "RECEIPT",
+                amount=Decimal("1234567.5") / (i + 1),
+                currency="USD" if i % 2 else "IQD",
+                date=f"2024-01-0{i + 1}",
+                description="وصف",
+                party_name="طرف",
+                category=category,
+            )
+        for i, status in enumerate(["PENDING", "ACCEPTED", "REJECTED"]):
+            quotation = Quotation.objects.create(
+                id=f"QT-{i}", client_name="عميل", client_phone="07", date="2024-02-01", total=Decimal(i) / 3,
+                status=status, note="n",
+            )
+            QuotationItem.objects.create(
+                quotation=quotation, description="item", price=Decimal("10.05"), quantity=i + 1
+            )
+        clause = ContractClause.objects.create(id="CL-0", title="t", content="c")
+        for i in range(3):
+            contract = Contract.objects.create(
+                id=f"CN-{i}", date="not a date", party_a_name="a", party_b_name="b", subject="s",
+                total_value=Decimal("99.999") if i else 0, status="ACTIVE" if i else "ARCHIVED",
+            )
+            ContractClauseLink.objects.create(contract=contract, clause=clause, order=0)
+        freelancer = Freelancer.objects.create(id="FL-0", name="Ali", phone="07700000000")
+        for i, date in enumerate(["2024-03-01", "", "2024-03-01", "x"]):
+            FreelanceWork.objects.create(
+                id=f"WK-{i}", freelancer=freelancer, description="d", date=date, price=Decimal("12.5"),
+                is_paid=bool(i % 2),
+            )
+        for i in range(3):
+            SMSLog.objects.create(
+                id=f"SL-{i}", to="+964", body="b", status="SUCCESS" if i else "FAILED",
+                delivery_updated_at=timezone.now() if i else None,
+            )
+
+    def walk(self, client, url):
+        """Bodies of every page of url, following the next links two rows at a time."""
+        bodies = []
+        url += ("&" if "?" in url else "?") + "page_size=2"
+        while url:
+            response = client.get(url, HTTP_ACCEPT="application/json")
+            self.assertEqual(response.status_code, 200, (url, response.content[:200]))
+            bodies.append(response.content)
+            url = response.json().get("next")
+        return bodies
+
+    def test_compiled_lists_match_the_serializers(self):
+        for user in self.users:
+            client = self.client_for(user)
+            for url in URLS:
+                with self.subTest(user=user.username, url=url):
+                    compiled = self.walk(client, url)
+                    with mock.patch.object(list_renderer, "compile_renderer", return_value=None):
+                        serialized = self.walk(client, url)
+                    self.assertEqual(compiled, serialized)
+
+    def test_plain_lists_are_compiled(self):
+        client = self.client_for(self.users[0])
+        for url in ["/api/vouchers/", "/api/quotations/", "/api/freelance-works/?fields=*", "/api/sms-logs/"]:
+            with self.subTest(url=url), mock.patch.object(
+                list_renderer.ValuesRenderer, "render", autospec=True, side_effect=list_renderer.ValuesRenderer.render
+            ) as render:
+                client.get(url)
+                render.assert_called_once()
@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+from api.models import Freelancer, FreelanceWork, User, Voucher
+
+from .base import APITestCase
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(User.objects.create_user("admin", password="x", role="ADMIN"))
+
+    def walk(self, url):
+        ids = []
+        while url:
+            data = self.client.get(url).json()
+            ids += [row["id"] for row in data["results"]]
+            url = data["next"]
+        return ids
+
+    def test_freelance_work_cursor_matches_page_order(self):
+        freelancer = Freelancer.objects.create(id="FL-1", name="Ali", phone="07700000001")
+        dates = ["2024-01-05", "2024-03-01", "not a date", "2024-03-01", "2023-12-31", "", "2024-01-05"]
+        for i, date in enumerate(dates):
+            FreelanceWork.objects.create(
+                id=f"WK-{i}", freelancer=freelancer, description="w", date=date, price=Decimal("10")
+            )
+        by_page = self.walk("/api/freelance-works/?page_size=2")
+        by_cursor = self.walk("/api/freelance-works/?cursor=&page_size=2")
+        self.assertEqual(by_cursor, by_page)
+        self.assertEqual(by_page, ["WK-1", "WK-3", "WK-0", "WK-6", "WK-4", "WK-2", "WK-5"])
+
+    def test_voucher_cursor_matches_page_order(self):
+        for i in range(5):
+            Voucher.objects.create(
+                id=f"VC-{i}", type="RECEIPT", amount=Decimal("1"), date="2024-01-01", party_name="p"
+            )
+        by_page = self.walk("/api/vouchers/?page_size=2")
+        self.assertEqual(self.walk("/api/vouchers/?cursor=&page_size=2"), by_page)
+        self.assertEqual(sorted(by_page), [f"VC-{i}" for i in range(5)])
@@ -0,0 +1,56 @@
+from decimal import Decimal
+
+from api.models import User, Voucher
+
+from .base import APITestCase
+
+
+class SummaryTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(User.objects.create_user("admin", password="x", role="ADMIN"))
+        vouchers = [
+            ("RECEIPT", "100", "IQD", "GENERAL", "2024-03-05"),
+            ("PAYMENT", "40", "IQD", "DAILY", "2024-03-06"),
+            ("PAYMENT", "15.50", "IQD", "SALARY", "2024-04-01"),
+            ("RECEIPT", "7.25", "USD", "GENERAL", "2024-03-05"),
+            ("PAYMENT", "2", "USD", "FREELANCE", "2024-05-01"),
+        ]
+        for i, (voucher_type, amount, currency, category, date) in enumerate(vouchers):
+            Voucher.objects.create(
+                id=f"VC-{i}", type=voucher_type, amount=Decimal(amount), currency=currency, category=category,
+                date=date, party_name=f"p{i}",
+            )
+
+    def by_currency(self, query=""):
+        response = self.client.get("/api/reports/summary/" + query)
+        self.assertEqual(response.status_code, 200)
+        return {
+            row["currency"]: (row["receipts"], row["payments"], row["net"], row["count"])
+            for row in response.json()["byCurrency"]
+        }
+
+    def test_totals_per_currency(self):
+        self.assertEqual(
+            self.by_currency(),
+            {"IQD": ("100.00", "55.50", "44.50", 3), "USD": ("7.25", "2.00", "5.25", 2)},
+        )
+
+    def test_filters(self):
+        self.assertEqual(
+            self.by_currency("?type=RECEIPT"),
+            {"IQD": ("100.00", "0.00", "100.00", 1), "USD": ("7.25", "0.00", "7.25", 1)},
+        )
+        self.assertEqual(self.by_currency("?currency=USD"), {"USD": ("7.25", "2.00", "5.25", 2)})
+        self.assertEqual(
+            self.by_currency("?category=DAILY,SALARY"), {"IQD": ("0.00", "55.50", "-55.50", 2)}
+        )
+        self.assertEqual(
+            self.by_currency("?date_from=2024-03-06&date_to=2024-04-30"),
+            {"IQD": ("0.00", "55.50", "-55.50", 2)},
+        )
+
+    def test_rejects_party_filter(self):
+        response = self.client.get("/api/reports/summary/?party=p0")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("party", response.json())
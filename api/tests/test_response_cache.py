@@ -0,0 +1,38 @@
+from decimal import Decimal
+
+from api import versions
+from api.models import User, Voucher
+
+from .base import APITestCase
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(User.objects.create_user("accountant", password="x", role="ACCOUNTANT"))
+        for voucher_id, category in [("VC-1", ""), ("VC-2", "OWNER_WITHDRAWAL")]:
+            Voucher.objects.create(
+                id=voucher_id, type="PAYMENT", amount=Decimal("1"), date="2024-01-01", party_name="p",
+                category=category,
+            )
+
+    def test_current_etag_is_not_modified(self):
+        etag = self.client.get("/api/vouchers/VC-1/")["ETag"]
+        response = self.client.get("/api/vouchers/VC-1/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_wildcard_does_not_reveal_missing_or_hidden_rows(self):
+        for url in ["/api/vouchers/NOPE/", "/api/vouchers/VC-2/"]:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH="*")
+                self.assertEqual(response.status_code, 404)
+
+    def test_bump_changes_the_etag(self):
+        etag = self.client.get("/api/vouchers/VC-1/")["ETag"]
+        before = versions.get_version(Voucher)
+        versions.bump_now(versions.label(Voucher))
+        versions.bump_now(versions.label(Voucher))
+        self.assertEqual(versions.get_version(Voucher), before + 2)
+        response = self.client.get("/api/vouchers/VC-1/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+from api import sms
+from api.models import AgencySettings, SMSLog, SMSOutbox, User
+
+from .base import APITestCase
+
+Status = SMSOutbox.OutboxStatus
+
+
+@override_settings(SMS_RETRY_BASE_SECONDS=30, SMS_MAX_ATTEMPTS=3)
+class OutboxWorkerTests(APITestCase):
+    """The send_sms_outbox worker loop (claim, send, record) against FakeSMSBackend."""
+
+    def setUp(self):
+        super().setUp()
+        AgencySettings.objects.create(
+            twilio={"isEnabled": True, "accountSid": "AC1", "authToken": "token", "fromNumber": "+1000"},
+        )
+
+    def process(self):
+        return sms.process_batch(10, concurrency=2, limiter=sms.RateLimiter(0))
+
+    def test_sends_and_logs(self):
+        message = sms.enqueue("+9647700000001", "hello")
+        self.assertEqual(self.process(), 1)
+        message.refresh_from_db()
+        self.assertEqual(message.status, Status.SENT)
+        self.assertTrue(message.sid.startswith("SMfake"))
+        self.assertEqual(sms.FakeSMSBackend.sent, [("+9647700000001", "hello")])
+        log = SMSLog.objects.get()
+        self.assertEqual((log.status, log.sid), (SMSLog.LogStatus.SUCCESS, message.sid))
+        self.assertEqual(self.process(), 0)
+
+    def test_claim_leases_messages(self):
+        message = sms.enqueue("+9647700000001", "hello")
+        claimed = sms.claim_batch(10, lease_seconds=60)
+        self.assertEqual([m.pk for m in claimed], [message.pk])
+        self.assertEqual((claimed[0].status, claimed[0].attempts), (Status.SENDING, 1))
+        self.assertGreater(claimed[0].locked_until, timezone.now())
+        self.assertEqual(sms.claim_batch(10), [])  # held by the first claim
+
+    def test_expired_lease_is_claimed_again(self):
+        sms.enqueue("+9647700000001", "hello")
+        first = sms.claim_batch(10)[0]
+        SMSOutbox.objects.filter(pk=first.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        second = sms.claim_batch(10)[0]
+        self.assertEqual(second.attempts, 2)
+        self.assertNotEqual(second.claim_token, first.claim_token)
+        # the first worker's late result no longer applies to the message
+        sms.record_results([(first, "SMlate", None)])
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.sid), (Status.SENDING, ""))
+
+    def test_transient_failure_is_retried_with_backoff(self):
+        message = sms.enqueue("+9647700000001", "hello")
+        sms.FakeSMSBackend.failures.append(sms.SMSDeliveryError("timeout"))
+        before = timezone.now()
+        self.process()
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.last_error), (Status.PENDING, 1, "timeout"))
+        self.assertGreaterEqual(message.next_attempt_at, before + timedelta(seconds=30))
+        self.assertFalse(SMSLog.objects.exists())
+        self.assertEqual(self.process(), 0)  # not due yet
+
+        SMSOutbox.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+        self.process()
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (Status.SENT, 2))
+
+    def test_retry_delay_doubles_and_is_capped(self):
+        self.assertEqual(
+            [sms.retry_delay(n).total_seconds() for n in (1, 2, 3, 20)], [30, 60, 120, sms.MAX_RETRY_DELAY_SECONDS]
+        )
+
+    def test_permanent_failure_is_not_retried(self):
+        message = sms.enqueue("+9647700000001", "hello")
+        sms.FakeSMSBackend.failures.append(sms.SMSPermanentError("invalid number"))
+        self.process()
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (Status.FAILED, 1))
+        log = SMSLog.objects.get()
+        self.assertEqual((log.status, log.error), (SMSLog.LogStatus.FAILED, "invalid number"))
+
+    def test_gives_up_after_max_attempts(self):
+        message = sms.enqueue("+9647700000001", "hello")
+        for _ in range(3):
+            sms.FakeSMSBackend.failures.append(sms.SMSDeliveryError("timeout"))
+            SMSOutbox.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+            self.process()
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (Status.FAILED, 3))
+        self.assertEqual(SMSLog.objects.get().status, SMSLog.LogStatus.FAILED)
+
+    def test_send_sms_view_queues_message(self):
+        user = User.objects.create_user("admin", password="x", role="ADMIN")
+        response = self.client_for(user).post(
+            "/api/send-sms/", {"to": "07700000001", "body": "hello"}, format="json"
+        )
+        self.assertEqual(response.status_code, 202)
+        message = SMSOutbox.objects.get(pk=response.json()["outboxId"])
+        self.assertEqual((message.to, message.status), ("+9647700000001", Status.PENDING))
+        self.assertEqual(sms.FakeSMSBackend.sent, [])
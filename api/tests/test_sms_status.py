@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.db import DatabaseError
+
+from api import sms
+from api.models import SMSLog
+
+from .base import APITestCase
+
+
+class DeliveryStatusBufferTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        # a long interval keeps the background thread out of the way; the tests flush
+        self.buffer = sms.DeliveryStatusBuffer(flush_seconds=3600)
+
+    def log(self, sid):
+        return SMSLog.objects.create(id=f"SL-{sid}", to="+9647700000001", body="hi", status="SUCCESS", sid=sid)
+
+    def test_applies_status_to_log(self):
+        log = self.log("SM1")
+        self.buffer.add("SM1", "delivered")
+        self.assertEqual(self.buffer.flush(), 1)
+        log.refresh_from_db()
+        self.assertEqual(log.delivery_status, "delivered")
+
+    def test_keeps_status_until_the_log_row_exists(self):
+        self.buffer.add("SM2", "delivered")
+        self.assertEqual(self.buffer.flush(), 0)
+        log = self.log("SM2")
+        self.buffer.add("SM2", "sent")  # arrives later but ranks lower
+        self.assertEqual(self.buffer.flush(), 1)
+        log.refresh_from_db()
+        self.assertEqual(log.delivery_status, "delivered")
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_drops_unmatched_status_after_ttl(self):
+        buffer = sms.DeliveryStatusBuffer(flush_seconds=3600, unmatched_ttl=0)
+        buffer.add("SM3", "delivered")
+        with self.assertLogs("api.sms", "WARNING"):
+            buffer.flush()
+        self.log("SM3")
+        self.assertEqual(buffer.flush(), 0)
+
+    def test_never_moves_back_in_rank(self):
+        log = self.log("SM4")
+        sms.apply_delivery_statuses({"SM4": ("delivered", "", None)})
+        sms.apply_delivery_statuses({"SM4": ("sent", "", None)})
+        log.refresh_from_db()
+        self.assertEqual(log.delivery_status, "delivered")
+
+    def test_flushes_in_chunks_and_keeps_only_failed_ones(self):
+        total = sms.STATUS_BATCH_SIZE * 2 + 1
+        for i in range(total):
+            self.log(f"SM-{i:04}")
+        # filled directly: add() would wake the flush thread once a batch is full
+        self.buffer._pending = {f"SM-{i:04}": ("delivered", "", None) for i in range(total)}
+        apply = sms.apply_delivery_statuses
+        calls = []
+
+        def fail_second_chunk(updates):
+            calls.append(len(updates))
+            if len(calls) == 2:
+                raise DatabaseError("locked")
+            return apply(updates)
+
+        with mock.patch.object(sms, "apply_delivery_statuses", side_effect=fail_second_chunk):
+            with self.assertRaises(DatabaseError):
+                self.buffer.flush()
+        self.assertEqual(calls, [sms.STATUS_BATCH_SIZE, sms.STATUS_BATCH_SIZE, 1])
+        self.assertEqual(SMSLog.objects.filter(delivery_status="delivered").count(), sms.STATUS_BATCH_SIZE + 1)
+        self.assertEqual(self.buffer.flush(), sms.STATUS_BATCH_SIZE)
+        self.assertEqual(SMSLog.objects.filter(delivery_status="delivered").count(), total)
@@ -0,0 +1,74 @@
+import base64
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from api import sync
+from api.models import Tombstone, User, Voucher
+
+from .base import APITestCase
+
+
+def make_voucher(voucher_id):
+    return Voucher.objects.create(
+        id=voucher_id, type="RECEIPT", amount=Decimal("1"), date="2024-01-01", party_name="p"
+    )
+
+
+class SyncTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(User.objects.create_user("admin", password="x", role="ADMIN"))
+
+    def sync(self, since=""):
+        response = self.client.get("/api/sync/", {"since": since})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_incremental_sync_reports_changes_and_deletes(self):
+        make_voucher("VC-1")
+        first = self.sync()
+        self.assertFalse(first["reset"])
+        self.assertEqual([v["id"] for v in first["changes"]["vouchers"]], ["VC-1"])
+
+        make_voucher("VC-2")
+        Voucher.objects.get(id="VC-1").delete()
+        second = self.sync(first["cursor"])
+        self.assertFalse(second["reset"])
+        self.assertIn("VC-2", [v["id"] for v in second["changes"]["vouchers"]])
+        self.assertEqual(second["deleted"]["vouchers"], ["VC-1"])
+
+    def test_malformed_cursor_is_a_bad_request(self):
+        cursors = [
+            "not a cursor",
+            [1],
+            {"vouchers": ["2024-01-01T00:00:00+00:00", "VC-9"]},  # positions without "at"
+            {"at": "2024-01-01T00:00:00", "positions": {}},  # naive time
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                since = base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+                response = self.client.get("/api/sync/", {"since": since})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("since", response.json())
+        self.assertEqual(self.client.get("/api/sync/", {"since": "%%%"}).status_code, 400)
+
+    def test_cursor_older_than_tombstones_resets(self):
+        make_voucher("VC-1")
+        stale = sync.encode_cursor(
+            timezone.now() - timedelta(days=sync.DEFAULT_TOMBSTONE_DAYS + 1),
+            {"vouchers": (timezone.now(), "VC-9")},
+        )
+        data = self.sync(stale)
+        self.assertTrue(data["reset"])
+        self.assertEqual([v["id"] for v in data["changes"]["vouchers"]], ["VC-1"])
+
+    def test_old_tombstones_are_pruned_on_delete(self):
+        old = Tombstone.objects.create(kind="vouchers", object_id="VC-0")
+        Tombstone.objects.filter(pk=old.pk).update(
+            deleted_at=timezone.now() - timedelta(days=sync.DEFAULT_TOMBSTONE_DAYS + 1)
+        )
+        make_voucher("VC-1").delete()
+        self.assertEqual(list(Tombstone.objects.values_list("object_id", flat=True)), ["VC-1"])
@@ -13,7 +13,12 @@ from .views import (
     FreelancerViewSet,
     FreelanceWorkViewSet,
     SMSLogViewSet,
+    ReportViewSet,
+    search,
     send_sms,
+    send_sms_bulk,
+    sms_status_callback,
+    sync_changes,
 )
 
 router = DefaultRouter()
@@ -25,8 +30,13 @@ router.register(r"contracts", ContractViewSet, basename="contract")
 router.register(r"freelancers", FreelancerViewSet, basename="freelancer")
 router.register(r"freelance-works", FreelanceWorkViewSet, basename="freelancework")
 router.register(r"sms-logs", SMSLogViewSet, basename="smslog")
+router.register(r"reports", ReportViewSet, basename="report")
 
 urlpatterns = [
     path("send-sms/", send_sms),
+    path("send-sms/bulk/", send_sms_bulk),
+    path("sms/status-callback/", sms_status_callback),
+    path("search/", search),
+    path("sync/", sync_changes),
     path("", include(router.urls)),
 ]
@@ -0,0 +1,45 @@
+"""
+Per-model change versions, one counter row per model label in api_model_version.
+
+A version is an integer per model label ("api.voucher"); it changes after every
+committed write to that model (see signals.py, and explicit bumps for QuerySet.update()
+callers). Anything derived from a model (cached responses, ETags, the settings cache)
+is tagged with the versions it was built from and is stale once they differ.
+The counters live in the database, like IdSequence, because a bump must never be lost:
+the cache backends have no atomic increment across processes and may evict keys.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import ModelVersion
+
+
+def label(model):
+    return model._meta.label_lower
+
+
+def get_versions(*models):
+    """{label: version} for the given models in one primary key query (0 if never bumped)."""
+    labels = [label(m) for m in models]
+    found = dict(ModelVersion.objects.filter(label__in=labels).values_list("label", "version"))
+    return {model_label: found.get(model_label, 0) for model_label in labels}
+
+
+def get_version(model):
+    return get_versions(model)[label(model)]
+
+
+def bump_now(model_label):
+    counters = ModelVersion.objects.filter(label=model_label)
+    with transaction.atomic():
+        if not counters.update(version=F("version") + 1):
+            ModelVersion.objects.get_or_create(label=model_label)
+            counters.update(version=F("version") + 1)
+
+
+def bump(*models):
+    """Change the versions of models once the current transaction commits."""
+    for model in models:
+        transaction.on_commit(partial(bump_now, label(model)))
@@ -1,20 +1,32 @@
 """
 ViewSets for Point Digital Marketing Manager API.
 """
+from decimal import Decimal
+
 from rest_framework import viewsets, status
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Min, Prefetch, Q, Sum
+from django.utils import timezone
+from django.views.static import serve
 
 from .models import (
     AgencySettings,
+    AgencySettingsService,
+    DailyLedger,
     Quotation,
+    QuotationItem,
     Voucher,
     Contract,
+    ContractClauseLink,
     Freelancer,
     FreelanceWork,
     SMSLog,
+    SearchDocument,
 )
 from .serializers import (
     UserSerializer,
@@ -24,9 +36,15 @@ from .serializers import (
     VoucherSerializer,
     ContractSerializer,
     FreelancerSerializer,
+    FreelancerSettleSerializer,
     FreelanceWorkSerializer,
     SMSLogSerializer,
 )
+from . import exports, list_renderer, logos, reports, search as search_index, settings_cache, sms, sync, versions
+from .id_utils import get_next_id
+from .filters import QueryParamFilterBackend
+from .pagination import KeysetPagination
+from .response_cache import CachedResponseMixin, conditional, conditional_get
 from .permissions import (
     IsAdminUser,
     IsAccountantReadAddOrAdmin,
@@ -36,12 +54,91 @@ from .permissions import (
 User = get_user_model()
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class ExportMixin:
+    """
+    GET <list>/export/?file_format=csv|xlsx streams the filtered list as a download,
+    with the same filters and role restrictions as the list endpoint.
+    """
+
+    export_columns = []  # [(header, field lookup)]
+    export_filename = "export"
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        file_format = (request.query_params.get("file_format") or "csv").lower()
+        if file_format not in exports.FILE_FORMATS:
+            return Response(
+                {"file_format": "Must be one of: " + ", ".join(exports.FILE_FORMATS)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        return exports.export_response(
+            queryset, self.export_columns, self.export_filename, file_format
+        )
+
+
+class SparseFieldsMixin:
+    """
+    ?fields=a,b / ?expand=items on list and retrieve (output names, see
+    serializers.SparseFieldsMixin). Lists default to the serializer's slim
+    Meta.list_fields, detail to every field. Only the columns of the returned fields are
+    selected (.only()) and prefetches are skipped unless a related field is returned.
+    List pages without related fields are built from .values() rows by
+    api.list_renderer instead of the serializer (same output, a fraction of the CPU).
+    """
+
+    def list(self, request, *args, **kwargs):
+        fields = self.get_sparse_fields()
+        renderer = list_renderer.compile_renderer(
+            self.get_serializer_class(), tuple(fields) if fields is not None else None
+        )
+        if renderer is None:
+            return super().list(request, *args, **kwargs)
+        keyset = [name.lstrip("-") for name in getattr(self, "keyset_ordering", ())]
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        queryset = queryset.values(*renderer.columns, *(k for k in keyset if k not in renderer.columns))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(renderer.render(page))
+        return Response(renderer.render(queryset))
+
+    def get_sparse_fields(self):
+        if self.action not in ("list", "retrieve"):
+            return None
+        if not hasattr(self, "_sparse_fields"):
+            self._sparse_fields = self.get_serializer_class().requested_fields(
+                self.request.query_params, detail=self.action == "retrieve"
+            )
+        return self._sparse_fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            context["fields"] = fields
+        return context
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return qs
+        columns, relations = self.get_serializer_class().sparse_columns(fields)
+        if not relations:
+            qs = qs.prefetch_related(None)
+        # keyset pages read their cursor from the last row
+        columns += [name.lstrip("-") for name in getattr(self, "keyset_ordering", ())]
+        return qs.only(*columns)
+
+
+class UserViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """List/retrieve/create for authenticated (incl. ACCOUNTANT); update/delete for ADMIN only."""
 
     queryset = User.objects.all().order_by("-date_joined")
     permission_classes = [IsAuthenticated]
     serializer_class = UserSerializer
+    cache_models = (User,)
+    cache_responses = False
 
     def get_permissions(self):
         if self.action in ("list", "retrieve", "me", "create"):
@@ -54,31 +151,57 @@ class UserViewSet(viewsets.ModelViewSet):
         return UserSerializer
 
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = UserSerializer(instance)
-        return Response(serializer.data)
+        def build():
+            instance = self.get_object()
+            serializer = UserSerializer(instance)
+            return Response(serializer.data)
+
+        return conditional(request, self.cache_models, build)
 
     @action(detail=False, methods=["get"], url_path="me")
+    @conditional_get(User, per_user=True)
     def me(self, request):
         """Return current authenticated user (for frontend after JWT login)."""
         serializer = UserSerializer(request.user)
         return Response(serializer.data)
 
 
-class AgencySettingsViewSet(viewsets.ModelViewSet):
+class AgencySettingsViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """CRUD for agency settings. Only ADMIN can access (read/write). Accountant has no access."""
 
-    queryset = AgencySettings.objects.all()
+    queryset = AgencySettings.objects.prefetch_related(
+        Prefetch("services_fk", queryset=AgencySettingsService.objects.order_by("id"))
+    )
     permission_classes = [IsAuthenticated, IsAdminUser]
     serializer_class = AgencySettingsSerializer
+    cache_models = (AgencySettings,)
+    cache_responses = False  # keeps Twilio credentials out of the cache files
 
 
-class QuotationViewSet(viewsets.ModelViewSet):
+class QuotationViewSet(CachedResponseMixin, SparseFieldsMixin, ExportMixin, viewsets.ModelViewSet):
     """Accountant: read + add only. Admin: full CRUD. set_status is update → admin only."""
 
-    queryset = Quotation.objects.all()
+    queryset = Quotation.objects.prefetch_related(
+        Prefetch("items", queryset=QuotationItem.objects.order_by("id"))
+    )
     permission_classes = [IsAuthenticated, IsAccountantReadAddOrAdmin]
     serializer_class = QuotationSerializer
+    cache_models = (Quotation,)
+    filter_backends = [QueryParamFilterBackend]
+    exact_filter_fields = {"status": "status", "currency": "currency"}
+    date_filter_field = "date_value"
+    text_filter_fields = {"client": ["client_name", "client_phone"]}
+    export_filename = "quotations"
+    export_columns = [
+        ("id", "id"),
+        ("clientName", "client_name"),
+        ("clientPhone", "client_phone"),
+        ("date", "date"),
+        ("total", "total"),
+        ("currency", "currency"),
+        ("status", "status"),
+        ("note", "note"),
+    ]
 
     def get_permissions(self):
         if self.action == "set_status":
@@ -100,12 +223,31 @@ class QuotationViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class VoucherViewSet(viewsets.ModelViewSet):
+class VoucherViewSet(CachedResponseMixin, SparseFieldsMixin, ExportMixin, viewsets.ModelViewSet):
     """Accountant: read + add only, and no access to OWNER_WITHDRAWAL. Admin: full CRUD."""
 
     queryset = Voucher.objects.all()
     permission_classes = [IsAuthenticated, IsAccountantReadAddOrAdmin]
+    cache_models = (Voucher,)
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-created_at", "-id")
     serializer_class = VoucherSerializer
+    filter_backends = [QueryParamFilterBackend]
+    exact_filter_fields = {"type": "type", "category": "category", "currency": "currency"}
+    date_filter_field = "date_value"
+    text_filter_fields = {"party": ["party_name", "party_phone"]}
+    export_filename = "vouchers"
+    export_columns = [
+        ("id", "id"),
+        ("type", "type"),
+        ("amount", "amount"),
+        ("currency", "currency"),
+        ("date", "date"),
+        ("description", "description"),
+        ("partyName", "party_name"),
+        ("partyPhone", "party_phone"),
+        ("category", "category"),
+    ]
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -122,28 +264,166 @@ class VoucherViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
-class ContractViewSet(viewsets.ModelViewSet):
+class ContractViewSet(CachedResponseMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """Accountant: read + add only. Admin: full CRUD."""
 
-    queryset = Contract.objects.all()
+    queryset = Contract.objects.prefetch_related(
+        Prefetch(
+            "clause_links",
+            queryset=ContractClauseLink.objects.select_related("clause").order_by("order"),
+        )
+    )
     permission_classes = [IsAuthenticated, IsAccountantReadAddOrAdmin]
     serializer_class = ContractSerializer
+    cache_models = (Contract,)
+    filter_backends = [QueryParamFilterBackend]
+    exact_filter_fields = {"status": "status"}
 
 
-class FreelancerViewSet(viewsets.ModelViewSet):
+class FreelancerViewSet(CachedResponseMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """Accountant: read + add. Admin: full CRUD. Freelancers (photographer/editor)."""
 
     queryset = Freelancer.objects.all()
     permission_classes = [IsAuthenticated, IsAccountantReadAddOrAdmin]
     serializer_class = FreelancerSerializer
+    cache_models = (Freelancer,)
+
+    @action(detail=False, methods=["get"])
+    @conditional_get(Freelancer, FreelanceWork)
+    def balances(self, request):
+        """
+        Unpaid and paid totals per freelancer and currency, plus the oldest unpaid work
+        date, from one aggregate query. Optional ?role=PHOTOGRAPHER|EDITOR.
+        """
+        freelancers = Freelancer.objects.all()
+        role = (request.query_params.get("role") or "").strip()
+        if role:
+            if role not in dict(Freelancer.Role.choices):
+                return Response({"role": "Invalid role"}, status=status.HTTP_400_BAD_REQUEST)
+            freelancers = freelancers.filter(role=role)
+        unpaid = Q(works__is_paid=False)
+        rows = (
+            freelancers.values("id", "name", "phone", "role", "works__currency")
+            .annotate(
+                unpaid=Sum("works__price", filter=unpaid),
+                paid=Sum("works__price", filter=Q(works__is_paid=True)),
+                unpaid_count=Count("works", filter=unpaid),
+                oldest_unpaid=Min("works__date_value", filter=unpaid),
+            )
+            .order_by("name", "id", "works__currency")
+        )
+        balances = {}
+        for row in rows:
+            entry = balances.get(row["id"])
+            if entry is None:
+                entry = balances[row["id"]] = {
+                    "freelancerId": row["id"],
+                    "name": row["name"],
+                    "phone": row["phone"],
+                    "role": row["role"],
+                    "balances": [],
+                    "oldestUnpaidDate": None,
+                }
+            if row["works__currency"] is None:
+                continue
+            entry["balances"].append(
+                {
+                    "currency": row["works__currency"],
+                    "unpaid": reports.format_money(row["unpaid"] or 0),
+                    "paid": reports.format_money(row["paid"] or 0),
+                    "unpaidCount": row["unpaid_count"],
+                }
+            )
+            if row["oldest_unpaid"]:
+                oldest = row["oldest_unpaid"].isoformat()
+                entry["oldestUnpaidDate"] = min(entry["oldestUnpaidDate"] or oldest, oldest)
+        return Response(list(balances.values()))
+
+    @action(detail=True, methods=["post"])
+    def settle(self, request, pk=None):
+        """
+        Body: { workIds: string[], date?: string, description?: string }.
+        In one transaction: sum the freelancer's selected unpaid works, create the
+        FREELANCE payment voucher and mark the works paid with its id.
+        Works must belong to this freelancer, be unpaid and share one currency.
+        """
+        freelancer = self.get_object()
+        body = FreelancerSettleSerializer(data=request.data)
+        body.is_valid(raise_exception=True)
+        work_ids = list(dict.fromkeys(body.validated_data["workIds"]))
+        with transaction.atomic():
+            works = list(
+                FreelanceWork.objects.select_for_update()
+                .filter(id__in=work_ids, freelancer=freelancer)
+                .only("id", "price", "currency", "is_paid")
+            )
+            missing = sorted(set(work_ids) - {w.id for w in works})
+            if missing:
+                return Response(
+                    {"detail": "Works not found for this freelancer.", "workIds": missing},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            paid = sorted(w.id for w in works if w.is_paid)
+            if paid:
+                return Response(
+                    {"detail": "Some works are already paid.", "workIds": paid},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            currencies = {w.currency for w in works}
+            if len(currencies) > 1:
+                return Response(
+                    {"detail": "Works in different currencies must be settled separately."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            voucher = Voucher.objects.create(
+                id=get_next_id("VC", Voucher),
+                type=Voucher.VoucherType.PAYMENT,
+                category=Voucher.Category.FREELANCE,
+                amount=sum((w.price for w in works), Decimal("0")),
+                currency=currencies.pop(),
+                date=body.validated_data.get("date") or timezone.localdate().isoformat(),
+                description=body.validated_data.get("description", ""),
+                party_name=freelancer.name,
+                party_phone=freelancer.phone or "",
+            )
+            updated = FreelanceWork.objects.filter(id__in=work_ids, is_paid=False).update(
+                is_paid=True, payment_id=voucher.id, updated_at=timezone.now()
+            )
+            if updated != len(work_ids):
+                # A concurrent settlement paid some of the works first.
+                transaction.set_rollback(True)
+                return Response(
+                    {"detail": "Some works are already paid."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            versions.bump(FreelanceWork)
+        return Response(
+            {"voucher": VoucherSerializer(voucher).data, "updated": updated},
+            status=status.HTTP_201_CREATED,
+        )
 
 
-class FreelanceWorkViewSet(viewsets.ModelViewSet):
+class FreelanceWorkViewSet(CachedResponseMixin, SparseFieldsMixin, ExportMixin, viewsets.ModelViewSet):
     """Accountant: read + add. Admin: full CRUD. Mark works as paid via action."""
 
     queryset = FreelanceWork.objects.all()
     permission_classes = [IsAuthenticated, IsAccountantReadAddOrAdmin]
+    cache_models = (FreelanceWork,)
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-date_value", "id")  # the model ordering, so both page modes agree
     serializer_class = FreelanceWorkSerializer
+    export_filename = "freelance-works"
+    export_columns = [
+        ("id", "id"),
+        ("freelancerId", "freelancer_id"),
+        ("freelancerName", "freelancer__name"),
+        ("description", "description"),
+        ("date", "date"),
+        ("price", "price"),
+        ("currency", "currency"),
+        ("isPaid", "is_paid"),
+        ("paymentId", "payment_id"),
+    ]
 
     @action(detail=False, methods=["post"], url_path="mark-paid")
     def mark_paid(self, request):
@@ -156,25 +436,141 @@ class FreelanceWorkViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
         updated = FreelanceWork.objects.filter(id__in=work_ids).update(
-            is_paid=True, payment_id=voucher_id
+            is_paid=True, payment_id=voucher_id, updated_at=timezone.now()
         )
+        versions.bump(FreelanceWork)
         return Response({"updated": updated})
 
 
-class SMSLogViewSet(viewsets.ModelViewSet):
+class SMSLogViewSet(CachedResponseMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """Accountant: read + add only. Admin: full access including delete."""
 
     queryset = SMSLog.objects.all()
     permission_classes = [IsAuthenticated, IsAccountantReadAddOrAdmin]
+    cache_models = (SMSLog,)
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-timestamp", "-id")
     serializer_class = SMSLogSerializer
     http_method_names = ["get", "post", "delete", "head", "options"]
 
 
+class ReportViewSet(viewsets.GenericViewSet):
+    """Voucher reports read from the DailyLedger rollup. Accountant figures exclude OWNER_WITHDRAWAL."""
+
+    queryset = DailyLedger.objects.all()
+    permission_classes = [IsAuthenticated]
+    filter_backends = [QueryParamFilterBackend]
+    exact_filter_fields = {"type": "type", "category": "category", "currency": "currency"}
+    date_filter_field = "day"
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if _is_accountant(self.request.user):
+            return qs.exclude(category=Voucher.Category.OWNER_WITHDRAWAL)
+        return qs
+
+    @action(detail=False, methods=["get"])
+    @conditional_get(Voucher, DailyLedger, AgencySettings)
+    def summary(self, request):
+        """
+        Receipts, payments, net and owner withdrawals per currency, category, month and year.
+        Filters: type, category, currency, date_from, date_to (as on /vouchers/). The
+        daily ledger has no party column, so ?party= is rejected. ?convert_to=IQD|USD adds
+        totals converted with the agency exchange rate.
+        """
+        if "party" in request.query_params:
+            return Response(
+                {"party": "Reports cannot be filtered by party; use /api/vouchers/?party=."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        convert_to = (request.query_params.get("convert_to") or "").strip().upper() or None
+        if convert_to and convert_to not in reports.CONVERTIBLE_CURRENCIES:
+            return Response(
+                {"convert_to": "Must be one of: " + ", ".join(reports.CONVERTIBLE_CURRENCIES)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        exchange_rate = None
+        if convert_to:
+            agency = settings_cache.get_settings()
+            exchange_rate = agency.exchange_rate if agency else None
+        rows = reports.ledger_day_totals(self.filter_queryset(self.get_queryset()))
+        return Response(reports.summarize(rows, convert_to, exchange_rate))
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@conditional_get(Quotation, Voucher, Contract, FreelanceWork, Freelancer, SearchDocument)
+def search(request):
+    """
+    Ranked full-text search. Query: ?q=words&kind=voucher,quotation&limit=20.
+    Kinds: quotation, voucher, contract, freelance_work. Arabic spelling variants match.
+    """
+    if not search_index.is_available():
+        return Response(
+            {"detail": "Full-text search requires the SQLite database backend."},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+    query = (request.query_params.get("q") or "").strip()
+    kinds = [k.strip() for k in (request.query_params.get("kind") or "").split(",") if k.strip()]
+    unknown = [k for k in kinds if k not in search_index.KINDS]
+    if unknown:
+        return Response(
+            {"kind": "Unknown kind: " + ", ".join(unknown)},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        limit = min(max(int(request.query_params.get("limit") or 20), 1), 100)
+    except ValueError:
+        return Response({"limit": "Must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    exclude_categories = []
+    if _is_accountant(request.user):
+        exclude_categories.append(Voucher.Category.OWNER_WITHDRAWAL)
+    results = search_index.search(
+        query, kinds=kinds, exclude_categories=exclude_categories, limit=limit
+    )
+    return Response({"results": results})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@conditional_get(*sync.KINDS)
+def sync_changes(request):
+    """
+    Rows created, changed or deleted since ?since=<cursor> (omit it for a full load), up
+    to ?limit= per collection. Repeat with the returned cursor while hasMore is true.
+    Accountants get vouchers that became OWNER_WITHDRAWAL as deleted. A malformed cursor
+    is a 400; one older than SYNC_TOMBSTONE_DAYS gets a full load with "reset": true.
+    """
+    try:
+        limit = min(max(int(request.query_params.get("limit") or sync.DEFAULT_LIMIT), 1), sync.MAX_LIMIT)
+    except ValueError:
+        return Response({"limit": "Must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    hide_withdrawals = None
+    if _is_accountant(request.user):
+
+        def hide_withdrawals(voucher):
+            return voucher.category == Voucher.Category.OWNER_WITHDRAWAL
+
+    collections = [
+        sync.Collection("quotations", QuotationViewSet.queryset.all(), QuotationSerializer),
+        sync.Collection("vouchers", VoucherViewSet.queryset.all(), VoucherSerializer, hide_withdrawals),
+        sync.Collection("contracts", ContractViewSet.queryset.all(), ContractSerializer),
+        sync.Collection("freelancers", FreelancerViewSet.queryset.all(), FreelancerSerializer),
+        sync.Collection("freelanceWorks", FreelanceWorkViewSet.queryset.all(), FreelanceWorkSerializer),
+        sync.Collection("smsLogs", SMSLogViewSet.queryset.all(), SMSLogSerializer),
+    ]
+    data = sync.changes(
+        collections, request.query_params.get("since"), limit, context={"request": request}
+    )
+    return Response(data)
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def send_sms(request):
     """
-    Send SMS via Twilio using agency settings. Body: { "to": "+964...", "body": "text" }.
+    Queue an SMS for delivery via Twilio using agency settings. Body: { "to": "+964...", "body": "text" }.
+    Input and settings are checked here; the send_sms_outbox worker delivers it and writes the SMS log.
     Credentials stay on server; avoids CORS and client exposure.
     """
     to = (request.data.get("to") or "").strip()
@@ -184,76 +580,113 @@ def send_sms(request):
             {"success": False, "error": "يجب تحديد رقم المستلم ونص الرسالة."},
             status=status.HTTP_400_BAD_REQUEST,
         )
-    settings_obj = AgencySettings.objects.first()
-    if not settings_obj or not settings_obj.twilio:
+    try:
+        sms.get_twilio_config()
+    except sms.SMSConfigError as e:
         return Response(
-            {"success": False, "error": "إعدادات Twilio غير متوفرة. احفظ الإعدادات من صفحة الإعدادات (مدير النظام) مع تفعيل ربط Twilio."},
+            {"success": False, "error": str(e)},
             status=status.HTTP_400_BAD_REQUEST,
         )
-    twilio_config = settings_obj.twilio or {}
-    # دعم camelCase و snake_case
-    is_enabled = twilio_config.get("isEnabled", twilio_config.get("is_enabled", False))
-    if not is_enabled:
+    message = sms.enqueue(sms.normalize_number(to), body)
+    return Response(
+        {"success": True, "queued": True, "outboxId": message.id},
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def send_sms_bulk(request):
+    """
+    Queue one templated SMS per recipient. Body: { "body": "مرحبا {name}", and either
+    "recipients": [{"to": "07...", "name": "..."} or "07..."] or "selector":
+    "pending_quotations" | "unpaid_freelancers" }. Numbers are normalized and deduplicated;
+    returns 202 with a per-recipient summary (queued / duplicate / invalid).
+    """
+    template = (request.data.get("body") or "").strip()
+    selector = (request.data.get("selector") or "").strip()
+    recipients = request.data.get("recipients")
+    if not template:
         return Response(
-            {"success": False, "error": "إرسال الرسائل معطل في الإعدادات. فعّل «الربط مفعل» في الإعدادات."},
+            {"success": False, "error": "يجب تحديد نص الرسالة."},
             status=status.HTTP_400_BAD_REQUEST,
         )
-    account_sid = (twilio_config.get("accountSid") or twilio_config.get("account_sid") or "").strip()
-    auth_token = (twilio_config.get("authToken") or twilio_config.get("auth_token") or "").strip()
-    from_number = (twilio_config.get("fromNumber") or twilio_config.get("from_number") or "").strip()
-    sender_name = (twilio_config.get("senderName") or twilio_config.get("sender_name") or "").strip()
-    # يمكن استخدام رقم المرسل أو Sender ID (اسم المرسل) فقط
-    from_value = from_number if from_number else sender_name
-    if not account_sid or not auth_token:
-        missing = []
-        if not account_sid:
-            missing.append("Account SID")
-        if not auth_token:
-            missing.append("Auth Token")
+    try:
+        sms.validate_template(template)
+    except ValueError:
         return Response(
-            {
-                "success": False,
-                "error": "بيانات Twilio ناقصة: " + "، ".join(missing) + ". ادخلها من الإعدادات > ربط إشعارات SMS (Twilio) واحفظ الصفحة."
-            },
+            {"success": False, "error": "قالب الرسالة غير صالح. استخدم متغيرات مثل {name}."},
             status=status.HTTP_400_BAD_REQUEST,
         )
-    if not from_value:
+    if selector:
+        if selector not in sms.SELECTORS:
+            return Response(
+                {"success": False, "error": "selector must be one of: " + ", ".join(sms.SELECTORS)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        recipients = sms.selector_recipients(selector)
+    elif isinstance(recipients, list):
+        recipients = [r if isinstance(r, dict) else {"to": r} for r in recipients]
+    else:
         return Response(
-            {
-                "success": False,
-                "error": "يجب إدخال رقم المرسل أو اسم المرسل (Sender ID) في الإعدادات. يمكنك ترك رقم المرسل فارغاً واستخدام اسم المرسل فقط."
-            },
+            {"success": False, "error": "يجب تحديد قائمة المستلمين أو selector."},
             status=status.HTTP_400_BAD_REQUEST,
         )
-    # تنسيق رقم الهاتف
-    if to.startswith("07") and len(to) >= 10:
-        to = "+964" + to[1:]
-    elif not to.startswith("+"):
-        to = "+" + to
-    try:
-        from twilio.rest import Client
-        client = Client(account_sid, auth_token)
-        message = client.messages.create(body=body, from_=from_value, to=to)
-        if message.sid:
-            return Response({"success": True})
+    max_recipients = getattr(settings, "SMS_BULK_MAX_RECIPIENTS", 1000)
+    if len(recipients) > max_recipients:
         return Response(
-            {"success": False, "error": "لم يتم إرجاع معرف الرسالة من Twilio."},
-            status=status.HTTP_502_BAD_GATEWAY,
+            {"success": False, "error": f"الحد الأقصى للمستلمين {max_recipients}."},
+            status=status.HTTP_400_BAD_REQUEST,
         )
-    except Exception as e:
-        import re
-        err_msg = str(e)
-        err_msg = re.sub(r"\x1b\[[0-9;]*m", "", err_msg).strip()
-        # رسالة مبسطة للحالات الشائعة
-        if "inactive" in err_msg.lower() or "90010" in err_msg:
-            err_msg = "حساب Twilio غير نشط. فعّل الحساب من لوحة Twilio (Console) أو استخدم حساباً آخر. تفاصيل: https://www.twilio.com/docs/errors/90010"
-        elif "authenticate" in err_msg.lower() or "20003" in err_msg:
-            err_msg = "بيانات Twilio غير صحيحة (Account SID أو Auth Token). تحقق من الإعدادات."
-        elif "21606" in err_msg or ("not a valid message-capable" in err_msg and "From" in err_msg):
-            err_msg = "اسم المرسل (Sender ID) غير مدعوم لهذا البلد. استخدم «رقم المرسل» في الإعدادات بدلاً من الاعتماد على الاسم فقط، أو راجع: https://www.twilio.com/docs/errors/21606"
-        elif "21211" in err_msg or "invalid" in err_msg.lower() and "to" in err_msg.lower():
-            err_msg = "رقم المستلم غير صالح. استخدم صيغة دولية مثل +9647xxxxxxxx"
+    try:
+        sms.get_twilio_config()
+    except sms.SMSConfigError as e:
         return Response(
-            {"success": False, "error": err_msg},
-            status=status.HTTP_502_BAD_GATEWAY,
+            {"success": False, "error": str(e)},
+            status=status.HTTP_400_BAD_REQUEST,
         )
+    summary = sms.enqueue_bulk(recipients, template)
+    counts = {"queued": 0, "duplicate": 0, "invalid": 0}
+    for entry in summary:
+        counts[entry["status"]] += 1
+    return Response(
+        {"success": True, **counts, "recipients": summary},
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+@api_view(["POST"])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def sms_status_callback(request):
+    """
+    Twilio message status callback (set SMS_STATUS_CALLBACK_URL to this endpoint's public URL).
+    Authenticated by the X-Twilio-Signature header instead of JWT / X-API-Key; updates are
+    buffered and applied to SMSLog in batches.
+    """
+    try:
+        config = sms.get_twilio_config()
+    except sms.SMSConfigError:
+        return Response({"detail": "Twilio is not configured."}, status=status.HTTP_403_FORBIDDEN)
+    url = getattr(settings, "SMS_STATUS_CALLBACK_URL", "") or request.build_absolute_uri()
+    params = request.POST.dict()
+    signature = request.headers.get("X-Twilio-Signature", "")
+    if not sms.validate_callback_signature(url, params, signature, config.auth_token):
+        return Response({"detail": "Invalid signature."}, status=status.HTTP_403_FORBIDDEN)
+    sid = params.get("MessageSid", "")
+    delivery_status = params.get("MessageStatus", "")
+    if not sid or not delivery_status:
+        return Response({"detail": "MessageSid and MessageStatus are required."}, status=status.HTTP_400_BAD_REQUEST)
+    sms.delivery_statuses.add(sid, delivery_status[:20], params.get("ErrorCode", "")[:10])
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def logo_file(request, path):
+    """
+    Stored logo files. Names carry a content hash, so responses may be cached forever.
+    In production Nginx serves /media/ directly with the same header (see DEPLOY.md).
+    """
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    response["Cache-Control"] = logos.CACHE_CONTROL
+    response["Content-Security-Policy"] = "default-src 'none'; style-src 'unsafe-inline'"  # inert SVGs
+    return response
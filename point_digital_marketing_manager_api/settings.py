@@ -87,6 +87,46 @@ USE_I18N = True
 USE_TZ = True
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
+# Uploaded files (agency logo and its variants, see api/logos.py)
+MEDIA_URL = "/media/"
+MEDIA_ROOT = os.getenv("MEDIA_ROOT") or BASE_DIR / "media"
+# Behind Nginx (sets X-Forwarded-Proto): absolute URLs such as logo links keep https.
+SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
+
+# ----- Cache -----
+# Cached responses only (api/response_cache.py); entries may be evicted at any time.
+# LocMemCache is per process and FileBasedCache has no atomic increment (and culls
+# random keys), so neither can hold shared counters: the change versions are kept in
+# the database instead (api/versions.py). FileBasedCache is shared by the workers of
+# one host; with several hosts use a shared cache (Redis, Memcached).
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("CACHE_LOCATION") or BASE_DIR / ".cache",
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    }
+}
+# Cached list/detail responses (api/response_cache.py) live this long at most; 0 disables them.
+RESPONSE_CACHE_SECONDS = 300
+# Deletes are reported to /api/sync/ clients for this many days; older cursors get a full reload.
+SYNC_TOMBSTONE_DAYS = 30
+
+# ----- SMS outbox (see api/sms.py) -----
+# Delivery backend; "api.sms.FakeSMSBackend" keeps messages in memory (tests / local runs).
+SMS_BACKEND = os.getenv("SMS_BACKEND") or "api.sms.TwilioBackend"
+# Attempts per message; retries wait SMS_RETRY_BASE_SECONDS * 2^(attempt-1), at most an hour.
+SMS_MAX_ATTEMPTS = 5
+SMS_RETRY_BASE_SECONDS = 30
+# Parallel sends per worker process, and the per-process send rate cap (messages/second).
+SMS_SEND_CONCURRENCY = 4
+SMS_MAX_PER_SECOND = 5
+# Public URL of /api/sms/status-callback/ (e.g. https://api.example.com/api/sms/status-callback/).
+# When set, Twilio reports delivery status there; it is also the URL the signature is checked against.
+SMS_STATUS_CALLBACK_URL = os.getenv("SMS_STATUS_CALLBACK_URL", "")
+# Delivery status callbacks are buffered and written at most this often (seconds).
+SMS_STATUS_FLUSH_SECONDS = 1.0
+# Largest recipient list accepted by /api/send-sms/bulk/.
+SMS_BULK_MAX_RECIPIENTS = 1000
 
 # ----- REST Framework -----
 REST_FRAMEWORK = {
@@ -142,6 +182,8 @@ CORS_ALLOW_HEADERS = [
     "x-requested-with",
     "x-api-key",
 ]
+# Let the frontend read ETags for conditional GETs (If-None-Match).
+CORS_EXPOSE_HEADERS = ["etag"]
 
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",